@@ -1,6 +1,35 @@
-from fastapi import APIRouter, Depends, Request, HTTPException
+from __future__ import annotations
 
-from app.core.fetch_image import fetch_image_from_url
+import asyncio
+import json
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+
+from fastapi import APIRouter, Depends, Request, HTTPException, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from starlette.datastructures import UploadFile
+
+from app.core.config import settings
+from app.core.executor import inference_executor
+from app.core.fetch_image import (
+    decode_image_async,
+    fetch_image_from_url,
+    read_image_body,
+    read_image_file,
+)
+from app.core.metrics import stage
+from app.core.timing import set_session
 from app.core.readiness import (
     require_clip_ready,
     require_food_ready,
@@ -10,16 +39,101 @@ from app.core.readiness import (
 from app.core.security import verify_internal_token
 from app.domain.actions import build_suggested_actions
 from app.domain.routing_hint import to_routing_hint
+from app.domain.speculative_food import speculative_food
+from app.domain.vision_cache import vision_cache
 from app.schemas.chat import (
     ChatRequest,
     ChatResponse,
     ChatData,
     VisionAnalysis,
 )
-from app.schemas.food_image import FoodImageRequest, FoodImageResponse
+from app.schemas.food_image import (
+    FoodImageBatchItem,
+    FoodImageBatchRequest,
+    FoodImageRequest,
+    FoodImageResponse,
+)
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from app.infra.preprocess import ImageInput
 
 router = APIRouter(prefix="/api/v1/inference", tags=["inference"])
 
+# -> (model input, decoded image); one per /food-image:batch item
+ImageLoader = Callable[[], Awaitable[Tuple["ImageInput", "Image.Image"]]]
+
+
+def _image_client(request: Request):
+    # shared keep-alive client created in lifespan (None -> per-call client)
+    clients = getattr(request.app.state, "http_clients", None)
+    return clients.image if clients is not None else None
+
+
+async def _load_image(
+    request: Request, image_url: str
+) -> Tuple[ImageInput, Image.Image]:
+    """
+    Fetch + decode, then one shared tensor conversion for all models.
+    Returns the model input and the decoded image (for the cache digest).
+    """
+    pil = await fetch_image_from_url(image_url, client=_image_client(request))
+    return await _prepare(pil)
+
+
+async def _load_upload(data: bytes) -> Tuple[ImageInput, Image.Image]:
+    # uploaded bytes: same decode (size-capped on read) and preprocessing
+    return await _prepare(await decode_image_async(data))
+
+
+async def _prepare(pil: Image.Image) -> Tuple[ImageInput, Image.Image]:
+    # torch/torchvision: only once the models are loaded (see app.main)
+    from app.infra.preprocess import prepare_image
+
+    with stage("preprocess"):
+        image = await inference_executor.run("decode", prepare_image, pil)
+    return image, pil
+
+
+async def _route_and_classify(
+    request: Request, image: ImageInput, digest: Optional[str]
+) -> Tuple[Any, Optional[Dict[str, Any]]]:
+    """
+    CLIP routing, then food top-3 for food images (None for non-food).
+    With SPECULATIVE_FOOD=1 the food model runs concurrently with the router.
+    """
+    router_service = request.app.state.vision_router
+
+    def route():
+        return vision_cache.get_or_compute(
+            "route", digest, lambda: router_service.route(image)
+        )
+
+    def classify():
+        food_pipeline = request.app.state.food_pipeline
+        return vision_cache.get_or_compute(
+            "food", digest, lambda: food_pipeline.analyze(image, top_k=3), top_k=3
+        )
+
+    # nothing to speculate on when the food result is cached (no model run;
+    # it must not count as a used speculative result) or when the cached
+    # route decision already says non-food (the result would be thrown away)
+    food_ready = getattr(request.app.state, "food_pipeline", None) is not None
+    cached_route = vision_cache.peek("route", digest)
+    speculate = (
+        food_ready
+        and not vision_cache.contains("food", digest, top_k=3)
+        and (cached_route is None or cached_route.is_food)
+    )
+    decision, fp = await speculative_food.route_and_classify(
+        route, classify, speculate=speculate
+    )
+    if decision.is_food and fp is None:
+        require_food_ready()
+        fp = await classify()
+    return decision, fp
+
 
 @router.post("/food-image", response_model=FoodImageResponse)
 async def food_image(
@@ -29,24 +143,60 @@ async def food_image(
     __=Depends(require_clip_ready),
     ___=Depends(require_food_ready),
 ):
+    set_session(req.session_id)
+
     # 1) fetch image (includes 5MB limit and content-type checks)
-    image = await fetch_image_from_url(req.image_url)
+    image, pil = await _load_image(request, req.image_url)
+
+    resp, decision = await _classify_food_image(request, image, pil)
+    # labels the request in /metrics
+    request.state.routing_hint = to_routing_hint(
+        is_food=decision.is_food, best_key=decision.best_key
+    )
+    return resp
+
+
+@router.post("/food-image:upload", response_model=FoodImageResponse)
+async def food_image_upload(
+    request: Request,
+    session_id: Optional[str] = None,
+    _=Depends(verify_internal_token),
+    __=Depends(require_clip_ready),
+    ___=Depends(require_food_ready),
+):
+    """
+    /food-image with the image as the raw request body (Content-Type
+    image/jpeg, image/png or image/webp; same 5MB limit) instead of an
+    image_url to fetch.
+    """
+    set_session(session_id)
+
+    # 1) read the body (same limits as a download) and decode it
+    image, pil = await _load_upload(await read_image_body(request))
+
+    resp, decision = await _classify_food_image(request, image, pil)
+    request.state.routing_hint = to_routing_hint(
+        is_food=decision.is_food, best_key=decision.best_key
+    )
+    return resp
 
-    # 2) route via CLIP (food and non-food)
-    router_service = request.app.state.vision_router
-    decision = router_service.route(image)
+
+async def _classify_food_image(
+    request: Request, image: ImageInput, pil: Image.Image
+) -> Tuple[FoodImageResponse, Any]:
+    # 2) route via CLIP (food and non-food) and 3) run food model top_k=3;
+    # same photo -> cached results
+    digest = await vision_cache.digest(pil)
+    decision, fp = await _route_and_classify(request, image, digest)
 
     if not decision.is_food:
-        return FoodImageResponse(
+        resp = FoodImageResponse(
             status="success",
             is_food=False,
             message="Cannot identify this image as food. Please submit a food image.",
             predictions=[],
         )
-
-    # 3) run food model top_k=3
-    food_pipeline = request.app.state.food_pipeline
-    fp = food_pipeline.analyze(image, top_k=3)
+        return resp, decision
 
     # fp["food_predictions"] includes rank/label/score/source
     # Convert to the original simple format: [{label, score}, ...]
@@ -55,12 +205,136 @@ async def food_image(
         for p in fp["food_predictions"]
     ]
 
-    return FoodImageResponse(
+    resp = FoodImageResponse(
         status="success",
         is_food=True,
         message="OK",
         predictions=predictions,
     )
+    return resp, decision
+
+
+@router.post("/food-image:batch")
+async def food_image_batch(
+    req: FoodImageBatchRequest,
+    request: Request,
+    _=Depends(verify_internal_token),
+    __=Depends(require_clip_ready),
+    ___=Depends(require_food_ready),
+):
+    """
+    /food-image for many URLs, streamed as NDJSON in completion order:
+    {"event": "item", "data": <FoodImageBatchItem>}   one per URL
+    {"event": "done", "data": {"total": n, "succeeded": n, "failed": n}}
+    Up to FOOD_IMAGE_BATCH_CONCURRENCY images are fetched and classified at
+    once; their CLIP and food passes are coalesced into tensor batches by the
+    micro-batchers. A failing image (fetch, decode, model) becomes an item
+    with status "error" and does not affect the others.
+    """
+    if len(req.image_urls) > settings.FOOD_IMAGE_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.FOOD_IMAGE_BATCH_MAX_ITEMS} image_urls per request",
+        )
+    set_session(req.session_id)
+
+    sources: List[Tuple[Dict[str, Any], ImageLoader]] = [
+        ({"image_url": url}, lambda url=url: _load_image(request, url))
+        for url in req.image_urls
+    ]
+    return _batch_response(request, sources)
+
+
+@router.post("/food-image:batch-upload")
+async def food_image_batch_upload(
+    request: Request,
+    session_id: Optional[str] = None,
+    _=Depends(verify_internal_token),
+    __=Depends(require_clip_ready),
+    ___=Depends(require_food_ready),
+):
+    """
+    /food-image:batch for uploaded files: multipart/form-data with one
+    `images` file part per image (image/jpeg, image/png or image/webp, 5MB
+    each). Items carry the part's `filename` instead of `image_url`.
+    """
+    form = await request.form(max_files=settings.FOOD_IMAGE_BATCH_MAX_ITEMS)
+    uploads = [f for f in form.getlist("images") if isinstance(f, UploadFile)]
+    if not uploads:
+        await form.close()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No `images` file parts in the request.",
+        )
+    set_session(session_id)
+
+    async def load(upload: UploadFile) -> Tuple[ImageInput, Image.Image]:
+        return await _load_upload(await read_image_file(upload))
+
+    sources: List[Tuple[Dict[str, Any], ImageLoader]] = [
+        ({"filename": upload.filename}, lambda upload=upload: load(upload))
+        for upload in uploads
+    ]
+    # the parts stay readable until the stream is done
+    return _batch_response(request, sources, on_close=form.close)
+
+
+def _batch_response(
+    request: Request,
+    sources: List[Tuple[Dict[str, Any], ImageLoader]],
+    on_close: Optional[Callable[[], Awaitable[None]]] = None,
+) -> StreamingResponse:
+    return StreamingResponse(
+        _batch_events(request, sources, on_close),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _batch_events(
+    request: Request,
+    sources: List[Tuple[Dict[str, Any], ImageLoader]],
+    on_close: Optional[Callable[[], Awaitable[None]]] = None,
+) -> AsyncIterator[bytes]:
+    limit = asyncio.Semaphore(max(1, settings.FOOD_IMAGE_BATCH_CONCURRENCY))
+    results: "asyncio.Queue[FoodImageBatchItem]" = asyncio.Queue()
+
+    async def one(index: int, ref: Dict[str, Any], load: ImageLoader) -> None:
+        async with limit:
+            try:
+                image, pil = await load()
+                resp, _ = await _classify_food_image(request, image, pil)
+                item = FoodImageBatchItem(index=index, **ref, **resp.model_dump())
+            except Exception as e:
+                error = e.detail if isinstance(e, HTTPException) else str(e)
+                item = FoodImageBatchItem(
+                    index=index, **ref, status="error", error=str(error)
+                )
+        results.put_nowait(item)
+
+    tasks = [
+        asyncio.create_task(one(i, ref, load)) for i, (ref, load) in enumerate(sources)
+    ]
+    failed = 0
+    try:
+        for _ in tasks:
+            item = await results.get()
+            failed += item.status == "error"
+            yield _ndjson({"event": "item", "data": item.model_dump()})
+    finally:
+        # client went away: stop fetching / classifying the rest
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if on_close is not None:
+            await on_close()
+
+    summary = {
+        "total": len(tasks),
+        "succeeded": len(tasks) - failed,
+        "failed": failed,
+    }
+    yield _ndjson({"event": "done", "data": summary})
 
 
 @router.post("/chat", response_model=ChatResponse)
@@ -70,6 +344,144 @@ async def chat(
     _=Depends(verify_internal_token),
     __=Depends(require_llm_ready),
 ):
+    set_session(req.session_id)
+    analyzed = await _analyze_chat_image(request, req.image_url)
+
+    # call LLM to generate intent and text response
+    llm = request.app.state.llm_engine
+    intent, text = await llm.generate_intent_and_text(
+        user_message=req.message,
+        user_context=req.user_context.model_dump(),
+        analyzed_image=analyzed.model_dump(),
+    )
+    return _chat_response(req, analyzed, intent, text)
+
+
+@router.post("/chat:upload", response_model=ChatResponse)
+async def chat_upload(
+    request: Request,
+    _=Depends(verify_internal_token),
+    __=Depends(require_llm_ready),
+):
+    """
+    /chat with the image uploaded instead of fetched: multipart/form-data
+    with a `payload` field holding the /chat JSON body (without image_url)
+    and an optional `image` file part (image/jpeg, image/png or image/webp,
+    same 5MB limit).
+    """
+    async with request.form(max_files=1, max_fields=1) as form:
+        req = _chat_payload(form.get("payload"))
+        upload = form.get("image")
+        data = None
+        if isinstance(upload, UploadFile):
+            if req.image_url:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Send either an `image` file or image_url, not both.",
+                )
+            data = await read_image_file(upload)
+
+    set_session(req.session_id)
+    analyzed = await _analyze_chat_image(request, req.image_url, data)
+
+    llm = request.app.state.llm_engine
+    intent, text = await llm.generate_intent_and_text(
+        user_message=req.message,
+        user_context=req.user_context.model_dump(),
+        analyzed_image=analyzed.model_dump(),
+    )
+    return _chat_response(req, analyzed, intent, text)
+
+
+def _chat_payload(payload: Any) -> ChatRequest:
+    # the JSON body of /chat, sent as a form field next to the file
+    if not isinstance(payload, str):
+        raise HTTPException(
+            status_code=422,
+            detail="Missing form field: payload",
+        )
+    try:
+        return ChatRequest.model_validate_json(payload)
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False)) from e
+
+
+@router.post("/chat:stream")
+async def chat_stream(
+    req: ChatRequest,
+    request: Request,
+    _=Depends(verify_internal_token),
+    __=Depends(require_llm_ready),
+):
+    """
+    Same as /chat, streamed as NDJSON (one JSON object per line):
+    {"event": "vision", "data": <VisionAnalysis>}   as soon as vision is done
+    {"event": "intent", "data": "<intent>"}          once the LLM has produced it
+    {"event": "token",  "data": "<text delta>"}      text_response as it is generated
+    {"event": "done",   "data": <ChatResponse>}      final result, same as /chat
+    {"event": "error",  "error": "..."}              if the LLM fails mid-stream
+    Vision errors are returned as regular HTTP errors before streaming starts.
+    """
+    set_session(req.session_id)
+    analyzed = await _analyze_chat_image(request, req.image_url)
+    llm = request.app.state.llm_engine
+
+    async def events():
+        yield _ndjson({"event": "vision", "data": analyzed.model_dump()})
+        try:
+            async for kind, value in llm.stream_intent_and_text(
+                user_message=req.message,
+                user_context=req.user_context.model_dump(),
+                analyzed_image=analyzed.model_dump(),
+            ):
+                if kind == "intent":
+                    yield _ndjson({"event": "intent", "data": value})
+                elif kind == "delta":
+                    yield _ndjson({"event": "token", "data": value})
+                else:
+                    intent, text = value
+                    resp = _chat_response(req, analyzed, intent, text)
+                    yield _ndjson({"event": "done", "data": resp.model_dump()})
+        except Exception as e:
+            # headers are already sent: report in-band
+            yield _ndjson({"event": "error", "error": f"LLM failed: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _ndjson(obj: dict) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _chat_response(
+    req: ChatRequest, analyzed: VisionAnalysis, intent: str, text: str
+) -> ChatResponse:
+    actions = build_suggested_actions(
+        is_food=analyzed.is_food,
+        session_id=req.session_id,
+        food_predictions=(analyzed.details or {}).get("food_predictions"),
+    )
+
+    data = ChatData(
+        text_response=text,
+        intent_detected=intent,
+        analyzed_image=analyzed,
+        suggested_actions=actions,
+    )
+    return ChatResponse(status="success", data=data)
+
+
+async def _analyze_chat_image(
+    request: Request, image_url: Optional[str], data: Optional[bytes] = None
+) -> VisionAnalysis:
+    """
+    Vision analysis for /chat: of `data` (uploaded image bytes) if given,
+    else of the image at `image_url`, if any.
+    """
     # defaults (important to avoid UnboundLocalError)
     decision = None
     detected_items = []
@@ -80,14 +492,17 @@ async def chat(
     router_best_key_score = None
     routing_hint = "no_image"  # default if no image
 
-    # if req.image_url is available, do vision analysis
-    # if False, skip vision analysis and go to LLM directly
-    if req.image_url:
+    # if an image is available, do vision analysis
+    # if not, skip vision analysis and go to LLM directly
+    if image_url or data is not None:
         require_clip_ready()
-        image = await fetch_image_from_url(req.image_url)
+        if data is not None:
+            image, pil = await _load_upload(data)
+        else:
+            image, pil = await _load_image(request, image_url)
 
-        router_service = request.app.state.vision_router
-        decision = router_service.route(image)
+        digest = await vision_cache.digest(pil)
+        decision, fp = await _route_and_classify(request, image, digest)
 
         router_food_score = decision.food_score
         router_best_key = decision.best_key
@@ -97,8 +512,6 @@ async def chat(
         )
 
         if decision.is_food:
-            require_food_ready()
-            fp = request.app.state.food_pipeline.analyze(image, top_k=3)
             detected_items = fp["detected_items"]
             details.update(
                 {
@@ -107,11 +520,25 @@ async def chat(
                 }
             )
         else:
-            try:
+
+            async def analyze_health() -> Dict[str, Any]:
+                # only on a cache miss: cached answers don't need BLIP loaded
                 await require_blip_ready()
-                hp = await request.app.state.health_pipeline.analyze(
+                health_pipeline = request.app.state.health_pipeline
+                return await health_pipeline.analyze(
                     image, clip_best_key=router_best_key or ""
                 )
+
+            try:
+                hp = await vision_cache.get_or_compute(
+                    "health",
+                    digest,
+                    analyze_health,
+                    clip_best_key=router_best_key or "",
+                )
+            except HTTPException:
+                # already shaped for the client (e.g. inference queue full)
+                raise
             except AttributeError as e:
                 # health_pipeline not initialized (often due to BLIP init failure at startup)
                 raise HTTPException(
@@ -137,6 +564,8 @@ async def chat(
                 }
             )
 
+    request.state.routing_hint = routing_hint  # labels the request in /metrics
+
     # populate details
     details.update(
         {
@@ -154,25 +583,4 @@ async def chat(
         detected_label=router_best_key,
         details=details,
     )
-
-    # call LLM to generate intent and text response
-    llm = request.app.state.llm_engine
-    intent, text = await llm.generate_intent_and_text(
-        user_message=req.message,
-        user_context=req.user_context.model_dump(),
-        analyzed_image=analyzed.model_dump(),
-    )
-
-    actions = build_suggested_actions(
-        is_food=analyzed.is_food,
-        session_id=req.session_id,
-        food_predictions=(analyzed.details or {}).get("food_predictions"),
-    )
-
-    data = ChatData(
-        text_response=text,
-        intent_detected=intent,
-        analyzed_image=analyzed,
-        suggested_actions=actions,
-    )
-    return ChatResponse(status="success", data=data)
+    return analyzed
@@ -0,0 +1,111 @@
+import asyncio
+from typing import Any, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+from app.core.executor import InferenceExecutor, inference_executor
+from app.core.metrics import BATCH_SIZE
+from app.core.timing import note
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroBatcher(Generic[T, R]):
+    """
+    Coalesces concurrent single-item calls into one batched call.
+
+    Items are collected until either `max_batch_size` items are waiting or
+    `max_wait_ms` has passed since the first one arrived, then `batch_fn`
+    runs once on the executor lane and each caller gets its own result back.
+    `batch_fn` must return one result per input item, in order.
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[T]], List[R]],
+        *,
+        lane: str,
+        max_batch_size: int,
+        max_wait_ms: float,
+        executor: Optional[InferenceExecutor] = None,
+    ) -> None:
+        self.batch_fn = batch_fn
+        self.lane = lane
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_s = max(0.0, float(max_wait_ms)) / 1000.0
+        self.executor = executor or inference_executor
+
+        self._pending: List[Tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.Handle] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        # simple counters (read by /health)
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future = loop.create_future()
+        self._pending.append((item, fut))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._flush)
+
+        result, batch_size = await fut
+        note(f"{self.lane}_batch", batch_size)
+        return result
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # callers that gave up (cancelled) are not worth computing
+        pending = [(item, fut) for item, fut in self._pending if not fut.done()]
+        batch = pending[: self.max_batch_size]
+        self._pending = pending[self.max_batch_size :]
+        if self._pending:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_soon(self._flush)
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        self.batches += 1
+        self.items += len(batch)
+        self.last_batch_size = len(batch)
+        BATCH_SIZE.observe(len(batch), lane=self.lane)
+
+        try:
+            results = await self.executor.run(
+                self.lane, self.batch_fn, [item for item, _ in batch]
+            )
+        except asyncio.CancelledError:
+            for _, fut in batch:
+                fut.cancel()
+            raise
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+
+        for (_, fut), res in zip(batch, results):
+            if not fut.done():
+                fut.set_result((res, len(batch)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_s * 1000.0,
+            "waiting": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "last_batch_size": self.last_batch_size,
+        }
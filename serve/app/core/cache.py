@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+
+class CacheBackend(Protocol):
+    """
+    Minimal key/value interface so a shared backend (e.g. Redis) can replace
+    the in-process one later without touching callers.
+    """
+
+    def get(self, key: str) -> Optional[Any]: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def stats(self) -> Dict[str, Any]: ...
+
+
+class InMemoryLRUCache:
+    """
+    Thread-safe in-process cache with LRU eviction and a per-entry TTL.
+    ttl_s <= 0 disables expiry.
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_s = float(ttl_s)
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            stored_at, value = item
+            if self.ttl_s > 0 and time.monotonic() - stored_at > self.ttl_s:
+                del self._data[key]
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "ttl_s": self.ttl_s,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
@@ -7,7 +7,13 @@ from pydantic import BaseModel
 
 # parents[2] => serve/
 BASE_DIR = Path(__file__).resolve().parents[2]
-artifacts_dir: str = str(BASE_DIR.parent / "artifacts")  # DACN2_AIserver/artifacts
+artifacts_dir: str = os.getenv(
+    "ARTIFACTS_DIR", str(BASE_DIR.parent / "artifacts")
+)  # DACN2_AIserver/artifacts
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in {"1", "true", "yes", "on"}
 
 
 class Settings(BaseModel):
@@ -25,14 +31,117 @@ class Settings(BaseModel):
         "BLIP_VQA_MODEL_NAME", "Salesforce/blip-vqa-base"
     )
     VQA_MAX_QUESTIONS: int = int(os.getenv("VQA_MAX_QUESTIONS", "6"))
+    # encode the image once and answer questions of equal token length together
+    VQA_BATCHED: bool = _env_bool("VQA_BATCHED", "1")
+
+    # eager: load at startup | background: start loading right after startup |
+    # lazy: start loading on the first request that needs it
+    BLIP_LOAD_POLICY: str = os.getenv("BLIP_LOAD_POLICY", "background").lower()
+    # how long a request waits for a BLIP load in progress before a 503 with
+    # Retry-After (0 = fail fast)
+    BLIP_LOAD_WAIT_S: float = float(os.getenv("BLIP_LOAD_WAIT_S", "0"))
+
+    # BLIP input side, used to size image decoding before BLIP is loaded
+    BLIP_IMAGE_SIZE: int = int(os.getenv("BLIP_IMAGE_SIZE", "384"))
+
+    # Decode images at reduced resolution (JPEG draft mode / box reduce)
+    DECODE_DOWNSCALE: bool = _env_bool("DECODE_DOWNSCALE", "1")
+
+    # Convert each image to a tensor once and derive every model's input from it
+    SHARED_PREPROCESS: bool = _env_bool("SHARED_PREPROCESS", "1")
+
+    # Per-request stage breakdown: Server-Timing header + one JSON log line
+    SERVER_TIMING: bool = _env_bool("SERVER_TIMING", "0")
+
+    # Start food classification together with CLIP routing (discarded if non-food)
+    SPECULATIVE_FOOD: bool = _env_bool("SPECULATIVE_FOOD", "0")
 
     # Device
     DEVICE: str = os.getenv("DEVICE", "auto").lower()  # auto | cuda | mps | cpu
+    # int8: dynamic int8 quantization of the CLIP image tower and BLIP-VQA
+    # linear layers (CPU only; the food model stays fp32)
+    QUANTIZE: str = os.getenv("QUANTIZE", "none").lower()  # none | int8
+
+    # Food model / CLIP image tower graph mode: none | trace (TorchScript) | compile
+    MODEL_COMPILE: str = os.getenv("MODEL_COMPILE", "none").lower()
+    # load + warm up the models after the server starts accepting requests
+    # (/health answers at once; /ready is 503 until done); 0 = before
+    MODEL_LOAD_BACKGROUND: bool = _env_bool("MODEL_LOAD_BACKGROUND", "1")
+    # run dummy batches through the models at startup, before reporting ready
+    MODEL_WARMUP: bool = _env_bool("MODEL_WARMUP", "1")
+    # food batch sizes to warm up, e.g. "1,4,8"; empty = 1..FOOD_BATCH_MAX_SIZE
+    WARMUP_BATCH_SIZES: str = os.getenv("WARMUP_BATCH_SIZES", "")
 
     # Ollama LLM
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
     OLLAMA_MODEL: str = os.getenv("OLLAMA_MODEL", "llama3.2:3b")
     OLLAMA_TIMEOUT_S: float = float(os.getenv("OLLAMA_TIMEOUT_S", "30"))
+    # how long Ollama keeps the model loaded after a call (Ollama duration / seconds)
+    OLLAMA_KEEP_ALIVE: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+    # load the model + prefill the system prompt at startup
+    OLLAMA_WARMUP: bool = _env_bool("OLLAMA_WARMUP", "1")
+    # ping the model when idle this long (0 disables)
+    OLLAMA_KEEP_WARM_INTERVAL_S: float = float(
+        os.getenv("OLLAMA_KEEP_WARM_INTERVAL_S", "240")
+    )
+
+    # Shared HTTP clients (image fetch + Ollama)
+    IMAGE_FETCH_TIMEOUT_S: float = float(os.getenv("IMAGE_FETCH_TIMEOUT_S", "10"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(
+        os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")
+    )
+    HTTP_KEEPALIVE_EXPIRY_S: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "30"))
+    HTTP2: bool = _env_bool("HTTP2", "0")
+
+    # Prefork serving (python -m app.serve): worker processes sharing the
+    # master's model weights, and torch intra-op threads per worker
+    # (0 = cores / WORKERS)
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    TORCH_THREADS: int = int(os.getenv("TORCH_THREADS", "0"))
+
+    # Inference executor (keeps torch work off the event loop)
+    INFERENCE_WORKERS: int = int(os.getenv("INFERENCE_WORKERS", "4"))
+    INFERENCE_MAX_QUEUE: int = int(os.getenv("INFERENCE_MAX_QUEUE", "64"))
+    CLIP_CONCURRENCY: int = int(os.getenv("CLIP_CONCURRENCY", "2"))
+    FOOD_CONCURRENCY: int = int(os.getenv("FOOD_CONCURRENCY", "2"))
+    BLIP_CONCURRENCY: int = int(os.getenv("BLIP_CONCURRENCY", "1"))
+
+    # Food model runtime: torch (timm module) | onnx (ONNX Runtime session)
+    FOOD_BACKEND: str = os.getenv("FOOD_BACKEND", "torch").lower()
+    # exported model (tools/export_onnx.py); empty = <artifacts>/food.onnx
+    FOOD_ONNX_PATH: str = os.getenv("FOOD_ONNX_PATH", "")
+    # ONNX Runtime thread pools (0 = ORT default)
+    ORT_INTRA_OP_THREADS: int = int(os.getenv("ORT_INTRA_OP_THREADS", "0"))
+    ORT_INTER_OP_THREADS: int = int(os.getenv("ORT_INTER_OP_THREADS", "0"))
+
+    # Food model micro-batching (FOOD_BATCH_MAX_SIZE=1 disables it)
+    FOOD_BATCH_MAX_SIZE: int = int(os.getenv("FOOD_BATCH_MAX_SIZE", "8"))
+    FOOD_BATCH_MAX_WAIT_MS: float = float(os.getenv("FOOD_BATCH_MAX_WAIT_MS", "5"))
+    # CLIP routing micro-batching (CLIP_BATCH_MAX_SIZE=1 disables it)
+    CLIP_BATCH_MAX_SIZE: int = int(os.getenv("CLIP_BATCH_MAX_SIZE", "8"))
+    CLIP_BATCH_MAX_WAIT_MS: float = float(os.getenv("CLIP_BATCH_MAX_WAIT_MS", "5"))
+
+    # Bulk classification (/food-image:batch): max URLs per request, and
+    # images fetched / classified concurrently per request
+    FOOD_IMAGE_BATCH_MAX_ITEMS: int = int(
+        os.getenv("FOOD_IMAGE_BATCH_MAX_ITEMS", "1000")
+    )
+    FOOD_IMAGE_BATCH_CONCURRENCY: int = int(
+        os.getenv("FOOD_IMAGE_BATCH_CONCURRENCY", "16")
+    )
+
+    # URL-level image fetch cache (raw bytes + ETag/Last-Modified revalidation)
+    FETCH_CACHE_ENABLED: bool = _env_bool("FETCH_CACHE_ENABLED", "0")
+    FETCH_CACHE_MAX_BYTES: int = int(
+        os.getenv("FETCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024))
+    )
+    FETCH_CACHE_TTL_S: float = float(os.getenv("FETCH_CACHE_TTL_S", "60"))
+
+    # Vision result cache (keyed by decoded image hash)
+    VISION_CACHE_ENABLED: bool = _env_bool("VISION_CACHE_ENABLED", "1")
+    VISION_CACHE_MAX_ENTRIES: int = int(os.getenv("VISION_CACHE_MAX_ENTRIES", "1024"))
+    VISION_CACHE_TTL_S: float = float(os.getenv("VISION_CACHE_TTL_S", "600"))
 
     # Artifacts dir
     artifacts_dir: str = artifacts_dir
@@ -0,0 +1,117 @@
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core.metrics import QUEUE_WAIT_SECONDS
+
+T = TypeVar("T")
+
+
+class InferenceExecutor:
+    """
+    Runs blocking model calls (CLIP, food model, BLIP) off the event loop.
+
+    - A thread pool is used: torch releases the GIL inside its kernels and the
+      models live in process-wide `model_state`, so threads share one copy of
+      the weights.
+    - `max_queue` bounds how many calls may be waiting or running at once;
+      beyond that callers get a fast 503 instead of piling up.
+    - Each lane (e.g. "clip", "food", "blip") has its own concurrency limit so
+      one slow model cannot occupy every worker.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        lane_limits: Optional[Dict[str, int]] = None,
+    ) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.max_queue = max(1, int(max_queue))
+        self.lane_limits: Dict[str, int] = dict(lane_limits or {})
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lanes: Dict[str, asyncio.Semaphore] = {}
+        self._pending = 0
+        self._running: Dict[str, int] = {}
+
+    def start(self) -> None:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="inference"
+            )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True, cancel_futures=True)
+            self._pool = None
+        self._lanes.clear()
+
+    def _lane(self, name: str) -> asyncio.Semaphore:
+        sem = self._lanes.get(name)
+        if sem is None:
+            limit = self.lane_limits.get(name, self.max_workers)
+            sem = asyncio.Semaphore(max(1, int(limit)))
+            self._lanes[name] = sem
+        return sem
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(
+        self, lane: str, fn: Callable[..., T], *args: Any, **kwargs: Any
+    ) -> T:
+        """
+        Submit `fn(*args, **kwargs)` to the pool under `lane` and await the result.
+        """
+        if self._pending >= self.max_queue:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Inference queue is full. Please retry later.",
+                headers={"Retry-After": "1"},
+            )
+
+        self.start()
+        self._pending += 1
+        t0 = time.perf_counter()
+        try:
+            async with self._lane(lane):
+                QUEUE_WAIT_SECONDS.observe(time.perf_counter() - t0, lane=lane)
+                self._running[lane] = self._running.get(lane, 0) + 1
+                try:
+                    loop = asyncio.get_running_loop()
+                    # carry contextvars (request timings) into the worker thread
+                    ctx = contextvars.copy_context()
+                    return await loop.run_in_executor(
+                        self._pool, functools.partial(ctx.run, fn, *args, **kwargs)
+                    )
+                finally:
+                    self._running[lane] -= 1
+        finally:
+            self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "running": dict(self._running),
+        }
+
+
+inference_executor = InferenceExecutor(
+    max_workers=settings.INFERENCE_WORKERS,
+    max_queue=settings.INFERENCE_MAX_QUEUE,
+    lane_limits={
+        "clip": settings.CLIP_CONCURRENCY,
+        "food": settings.FOOD_CONCURRENCY,
+        "blip": settings.BLIP_CONCURRENCY,
+    },
+)
@@ -0,0 +1,129 @@
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Mapping, Optional
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+@dataclass
+class CachedImage:
+    data: bytes
+    content_type: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh_until: float
+
+    def is_fresh(self) -> bool:
+        return time.monotonic() < self.fresh_until
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers: Dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ImageFetchCache:
+    """
+    URL -> raw image bytes, bounded by total stored bytes (LRU eviction).
+
+    Fresh entries are served without a network round trip; stale entries are
+    revalidated with a conditional GET using their ETag / Last-Modified.
+    Freshness follows Cache-Control (no-store / no-cache / max-age) and falls
+    back to `default_ttl_s`.
+    """
+
+    def __init__(self, max_bytes: int, default_ttl_s: float) -> None:
+        self.max_bytes = max(0, int(max_bytes))
+        self.default_ttl_s = float(default_ttl_s)
+        self._data: "OrderedDict[str, CachedImage]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, url: str) -> Optional[CachedImage]:
+        entry = self._data.get(url)
+        if entry is not None:
+            self._data.move_to_end(url)
+        return entry
+
+    def _ttl(self, headers: Mapping[str, str]) -> Optional[float]:
+        """
+        None -> must not be stored. 0 -> store but always revalidate.
+        """
+        cc = headers.get("cache-control", "").lower()
+        if "no-store" in cc:
+            return None
+        if "no-cache" in cc:
+            return 0.0
+        m = _MAX_AGE_RE.search(cc)
+        if m:
+            return float(m.group(1))
+        return self.default_ttl_s
+
+    def put(
+        self, url: str, data: bytes, content_type: str, headers: Mapping[str, str]
+    ) -> None:
+        ttl = self._ttl(headers)
+        etag = headers.get("etag")
+        last_modified = headers.get("last-modified")
+        # nothing to revalidate with and already expired -> no point storing
+        if ttl is None or (ttl <= 0 and not etag and not last_modified):
+            self.discard(url)
+            return
+        if len(data) > self.max_bytes:
+            self.discard(url)
+            return
+
+        self.discard(url)
+        self._data[url] = CachedImage(
+            data=data,
+            content_type=content_type,
+            etag=etag,
+            last_modified=last_modified,
+            fresh_until=time.monotonic() + ttl,
+        )
+        self._bytes += len(data)
+
+        while self._bytes > self.max_bytes and self._data:
+            _, old = self._data.popitem(last=False)
+            self._bytes -= len(old.data)
+            self.evictions += 1
+
+    def refresh(self, url: str, headers: Mapping[str, str]) -> None:
+        """
+        Apply a 304 Not Modified: keep the bytes, renew validators and freshness.
+        """
+        entry = self._data.get(url)
+        if entry is None:
+            return
+        ttl = self._ttl(headers)
+        if ttl is None:
+            self.discard(url)
+            return
+        entry.etag = headers.get("etag") or entry.etag
+        entry.last_modified = headers.get("last-modified") or entry.last_modified
+        entry.fresh_until = time.monotonic() + ttl
+
+    def discard(self, url: str) -> None:
+        old = self._data.pop(url, None)
+        if old is not None:
+            self._bytes -= len(old.data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,68 +1,214 @@
 from io import BytesIO
+from typing import AsyncIterator, Dict, List, Mapping, Optional
 
 import httpx
 from PIL import Image
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
+from starlette.datastructures import UploadFile
+
+from app.core.config import settings
+from app.core.executor import inference_executor
+from app.core.fetch_cache import CachedImage, ImageFetchCache
+from app.core.metrics import CACHE_LOOKUPS, stage
+from app.core.state import model_state
+from app.core.timing import note
 
 MAX_IMAGE_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/webp"}
 
 CHUNK_SIZE = 64 * 1024  # 64KB
 
+# Optional URL-level cache of raw bytes (FETCH_CACHE_ENABLED)
+fetch_cache: Optional[ImageFetchCache] = (
+    ImageFetchCache(
+        max_bytes=settings.FETCH_CACHE_MAX_BYTES,
+        default_ttl_s=settings.FETCH_CACHE_TTL_S,
+    )
+    if settings.FETCH_CACHE_ENABLED
+    else None
+)
+
 
-async def fetch_image_from_url(image_url: str) -> Image.Image:
+async def fetch_image_from_url(
+    image_url: str, client: Optional[httpx.AsyncClient] = None
+) -> Image.Image:
     """
     Stream download with a hard byte cap (<= 5MB).
+    `client` is the shared app client (keep-alive); without it a one-off
+    client is created for this call.
     NOTE: SSRF hardening is intentionally NOT included (per current requirement).
     """
-    timeout = httpx.Timeout(10.0)
-
-    async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as client:
-        async with client.stream("GET", image_url) as resp:
-            if resp.status_code != 200:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to fetch image from image_url.",
-                )
-
-            content_type = resp.headers.get("content-type", "").split(";")[0].lower()
-            if content_type not in ALLOWED_CONTENT_TYPES:
-                raise HTTPException(
-                    status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
-                    detail=f"Unsupported image content-type: {content_type}",
-                )
-
-            # Early reject if Content-Length provided and too large
-            cl = resp.headers.get("content-length")
-            if cl:
-                try:
-                    if int(cl) > MAX_IMAGE_SIZE:
-                        raise HTTPException(
-                            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                            detail="Image size exceeds 5MB limit.",
-                        )
-                except ValueError:
-                    # ignore invalid content-length; enforce via streaming cap below
-                    pass
-
-            buf = BytesIO()
-            total = 0
-
-            async for chunk in resp.aiter_bytes(CHUNK_SIZE):
-                if not chunk:
-                    continue
-                total += len(chunk)
-                if total > MAX_IMAGE_SIZE:
-                    raise HTTPException(
-                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
-                        detail="Image size exceeds 5MB limit.",
-                    )
-                buf.write(chunk)
+    with stage("fetch"):
+        data = await fetch_image_bytes(image_url, client=client)
+    return await decode_image_async(data)
+
+
+async def decode_image_async(data: bytes) -> Image.Image:
+    with stage("decode"):
+        return await inference_executor.run("decode", decode_image, data)
+
+
+async def fetch_image_bytes(
+    image_url: str, client: Optional[httpx.AsyncClient] = None
+) -> bytes:
+    cached = fetch_cache.get(image_url) if fetch_cache is not None else None
+    if cached is not None and cached.is_fresh():
+        fetch_cache.hits += 1
+        CACHE_LOOKUPS.inc(cache="fetch", result="hit")
+        note("fetch_cache", "hit")
+        return cached.data
+
+    if client is None:
+        timeout = httpx.Timeout(settings.IMAGE_FETCH_TIMEOUT_S)
+        async with httpx.AsyncClient(timeout=timeout, follow_redirects=True) as c:
+            return await _download(image_url, c, cached)
+    return await _download(image_url, client, cached)
+
+
+async def _download(
+    image_url: str, client: httpx.AsyncClient, cached: Optional[CachedImage]
+) -> bytes:
+    headers: Dict[str, str] = cached.conditional_headers() if cached else {}
+
+    async with client.stream("GET", image_url, headers=headers) as resp:
+        if cached is not None and resp.status_code == 304:
+            fetch_cache.revalidated += 1
+            CACHE_LOOKUPS.inc(cache="fetch", result="revalidated")
+            note("fetch_cache", "revalidated")
+            fetch_cache.refresh(image_url, resp.headers)
+            return cached.data
+
+        if resp.status_code != 200:
+            if cached is not None:
+                # the origin no longer serves what is cached: don't keep it
+                fetch_cache.discard(image_url)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to fetch image from image_url.",
+            )
+
+        content_type = check_image_headers(resp.headers)
+        data = await read_capped(resp.aiter_bytes(CHUNK_SIZE))
+
+        if fetch_cache is not None:
+            fetch_cache.misses += 1
+            CACHE_LOOKUPS.inc(cache="fetch", result="miss")
+            note("fetch_cache", "miss")
+            fetch_cache.put(image_url, data, content_type, resp.headers)
+
+    return data
+
+
+async def read_image_body(request: Request) -> bytes:
+    """
+    Raw image upload (request body), with the same content-type and 5MB
+    checks as a download.
+    """
+    check_image_headers(request.headers)
+    return await read_capped(request.stream())
+
+
+async def read_image_file(upload: UploadFile) -> bytes:
+    """
+    Image file part of a multipart upload, with the same checks.
+    """
+    check_image_headers(upload.headers)
+    if upload.size is not None and upload.size > MAX_IMAGE_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="Image size exceeds 5MB limit.",
+        )
+    return await upload.read()
+
+
+def check_image_headers(headers: Mapping[str, str]) -> str:
+    """
+    Content-type allow-list and early size reject from the headers of an
+    image response / upload. Returns the content type.
+    """
+    content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+    if content_type not in ALLOWED_CONTENT_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Unsupported image content-type: {content_type}",
+        )
+
+    # Early reject if Content-Length provided and too large
+    cl = headers.get("content-length")
+    if cl:
+        try:
+            too_large = int(cl) > MAX_IMAGE_SIZE
+        except ValueError:
+            # ignore invalid content-length; enforce via streaming cap
+            too_large = False
+        if too_large:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Image size exceeds 5MB limit.",
+            )
+    return content_type
+
+
+async def read_capped(stream: AsyncIterator[bytes]) -> bytes:
+    # stop reading as soon as the cap is crossed
+    chunks: List[bytes] = []
+    total = 0
+
+    async for chunk in stream:
+        if not chunk:
+            continue
+        total += len(chunk)
+        if total > MAX_IMAGE_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail="Image size exceeds 5MB limit.",
+            )
+        chunks.append(chunk)
+
+    return b"".join(chunks)
+
+
+def decode_image(data: bytes, min_side: Optional[int] = None) -> Image.Image:
+    """
+    Decode to RGB at the smallest scale whose shorter side is still >= min_side
+    (default: model_state.decode_side, the largest model input). JPEGs are
+    decoded directly at reduced scale via draft mode (DCT scaling); other
+    formats are box-reduced after decoding. min_side=0 -> full resolution.
+    """
+    if min_side is None:
+        min_side = model_state.decode_side if settings.DECODE_DOWNSCALE else 0
 
     try:
-        return Image.open(BytesIO(buf.getvalue())).convert("RGB")
+        img = Image.open(BytesIO(data))
+        if min_side and img.format == "JPEG":
+            img.draft("RGB", (min_side, min_side))
+        img.load()
+
+        if min_side:
+            factor = min(img.size) // min_side
+            if factor >= 2:
+                img = img.reduce(factor)
+
+        return img if img.mode == "RGB" else img.convert("RGB")
     except Exception:
         raise HTTPException(
             status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
             detail="Invalid image data.",
         )
+
+
+def processor_input_side(processor) -> int:
+    """
+    Largest spatial size a HF image processor resizes/crops to (0 if unknown).
+    """
+    image_processor = getattr(processor, "image_processor", processor)
+    sides = [0]
+    for attr in ("size", "crop_size"):
+        value = getattr(image_processor, attr, None)
+        if isinstance(value, int):
+            sides.append(value)
+        elif value is not None:
+            # dict ({"shortest_edge": 224} / {"height": h, "width": w}) or SizeDict
+            items = value.items() if hasattr(value, "items") else vars(value).items()
+            sides += [int(v) for _, v in items if isinstance(v, int)]
+    return max(sides)
@@ -0,0 +1,43 @@
+from dataclasses import dataclass
+
+import httpx
+
+from app.core.config import settings
+
+
+@dataclass
+class HttpClients:
+    """
+    Application-lifetime HTTP clients (created in lifespan, closed on shutdown).
+    Reusing them keeps TCP/TLS connections alive between requests.
+    """
+
+    image: httpx.AsyncClient
+    ollama: httpx.AsyncClient
+
+    async def aclose(self) -> None:
+        await self.image.aclose()
+        await self.ollama.aclose()
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_S,
+    )
+
+
+def build_http_clients() -> HttpClients:
+    image = httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.IMAGE_FETCH_TIMEOUT_S),
+        limits=_limits(),
+        http2=settings.HTTP2,
+        follow_redirects=True,
+    )
+    # Ollama is plain http on a sidecar: HTTP/1.1 keep-alive is what matters
+    ollama = httpx.AsyncClient(
+        timeout=httpx.Timeout(settings.OLLAMA_TIMEOUT_S),
+        limits=_limits(),
+    )
+    return HttpClients(image=image, ollama=ollama)
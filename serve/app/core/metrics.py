@@ -0,0 +1,358 @@
+import abc
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.timing import current_timings
+
+# Minimal Prometheus text-format instruments (no client library needed).
+# Label values are passed as keyword arguments: COUNTER.inc(endpoint="/chat").
+
+LabelKey = Tuple[str, ...]
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], **extra: str) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    kind = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name}: expected labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    @abc.abstractmethod
+    def render(self) -> List[str]: ...
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def values(self) -> Dict[LabelKey, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self.header()
+        for key, value in items:
+            labels = _fmt_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_fmt_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        # per label set: [count per bucket (+Inf last)], sum
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[i] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((k, list(c), self._sums[k]) for k, c in self._counts.items())
+        lines = self.header()
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                labels = _fmt_labels(self.labelnames, key, le=_fmt_value(bound))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _fmt_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_fmt_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Holds the instruments and renders them in the Prometheus text format.
+    Collectors run right before rendering to refresh gauges that mirror
+    state kept elsewhere (queue depths, cache stats, ...).
+    """
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn: Callable[[], None]) -> None:
+        self._collectors.append(fn)
+
+    def render(self) -> str:
+        for fn in self._collectors:
+            fn()
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+REQUESTS = REGISTRY.register(
+    Counter(
+        "inference_requests_total",
+        "HTTP requests by endpoint, outcome and routing hint.",
+        ("endpoint", "outcome", "routing_hint"),
+    )
+)
+REQUEST_SECONDS = REGISTRY.register(
+    Histogram(
+        "inference_request_duration_seconds",
+        "Time until the response (or the end of a streamed response) was sent.",
+        ("endpoint",),
+    )
+)
+STAGE_SECONDS = REGISTRY.register(
+    Histogram(
+        "inference_stage_duration_seconds",
+        "Latency of one pipeline stage, including time queued for a worker.",
+        ("stage",),
+    )
+)
+QUEUE_WAIT_SECONDS = REGISTRY.register(
+    Histogram(
+        "inference_queue_wait_seconds",
+        "Time a model call waited for its executor lane.",
+        ("lane",),
+    )
+)
+BATCH_SIZE = REGISTRY.register(
+    Histogram(
+        "inference_batch_size",
+        "Items per micro-batch.",
+        ("lane",),
+        buckets=(1, 2, 4, 8, 16, 32, 64),
+    )
+)
+CACHE_LOOKUPS = REGISTRY.register(
+    Counter(
+        "inference_cache_lookups_total",
+        "Cache lookups by cache and result (hit / miss / revalidated).",
+        ("cache", "result"),
+    )
+)
+CACHE_HIT_RATIO = REGISTRY.register(
+    Gauge(
+        "inference_cache_hit_ratio",
+        "Share of lookups served from the cache since startup.",
+        ("cache",),
+    )
+)
+QUEUE_DEPTH = REGISTRY.register(
+    Gauge(
+        "inference_queue_depth",
+        "Model calls waiting or running in the inference executor.",
+    )
+)
+LANE_RUNNING = REGISTRY.register(
+    Gauge(
+        "inference_lane_running",
+        "Model calls currently running per executor lane.",
+        ("lane",),
+    )
+)
+BATCH_WAITING = REGISTRY.register(
+    Gauge(
+        "inference_batch_waiting",
+        "Items waiting for the next micro-batch.",
+        ("lane",),
+    )
+)
+MODEL_LOAD_SECONDS = REGISTRY.register(
+    Gauge(
+        "inference_model_load_seconds",
+        "Wall time spent loading each model.",
+        ("model",),
+    )
+)
+LLM_TOKENS = REGISTRY.register(
+    Histogram(
+        "inference_llm_tokens",
+        "Tokens per Ollama call by phase: prompt_eval (prefill; only the part "
+        "of the prompt not reused from Ollama's prefix cache) and eval.",
+        ("phase",),
+        buckets=(8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096),
+    )
+)
+LLM_SECONDS = REGISTRY.register(
+    Histogram(
+        "inference_llm_duration_seconds",
+        "Ollama-reported time per call by phase (prompt_eval, eval, load, total).",
+        ("phase",),
+    )
+)
+LLM_COLD_LOADS = REGISTRY.register(
+    Counter(
+        "inference_llm_cold_loads_total",
+        "Ollama calls that had to load the model first (load > 0.5 s).",
+    )
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Time a pipeline stage: `with stage("clip_route"): ...` (works around
+    awaits too). Also recorded in the request's RequestTimings, if any.
+    """
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        dt = time.perf_counter() - t0
+        STAGE_SECONDS.observe(dt, stage=name)
+        timings = current_timings()
+        if timings is not None:
+            timings.add_stage(name, dt)
+
+
+def cache_hit_ratio(cache: str, hits: int, lookups: int) -> None:
+    CACHE_HIT_RATIO.set(hits / lookups if lookups else 0.0, cache=cache)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests by endpoint (route template),
+    outcome and routing hint (set by handlers on request.state.routing_hint),
+    and timing them until the last body chunk is sent.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        t0 = time.perf_counter()
+        status_code: Optional[int] = None
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            endpoint = getattr(route, "path", None) or "unmatched"
+            hint = (scope.get("state") or {}).get("routing_hint", "none")
+            REQUESTS.inc(
+                endpoint=endpoint,
+                outcome=_outcome(status_code),
+                routing_hint=hint,
+            )
+            REQUEST_SECONDS.observe(time.perf_counter() - t0, endpoint=endpoint)
+
+
+def _outcome(status_code: Optional[int]) -> str:
+    if status_code is None or status_code >= 500:
+        return "server_error"
+    if status_code >= 400:
+        return "client_error"
+    return "ok"
@@ -1,7 +1,14 @@
+import asyncio
+
 from fastapi import HTTPException, Request, status
 
+from app.core.config import settings
 from app.core.state import model_state
-from app.infra.blip_vqa import ensure_blip_loaded
+from app.infra.blip_loader import ensure_blip_loaded
+
+# BLIP loads in tens of seconds on CPU; don't invite a retry storm
+BLIP_RETRY_AFTER_S = 5
+MODEL_RETRY_AFTER_S = 5
 
 
 def _startup_error_suffix() -> str:
@@ -20,31 +27,51 @@ def require_llm_ready(request: Request) -> None:
         )
 
 
-def require_clip_ready() -> None:
-    # CLIP is required by ClipRouter constructor
-    if model_state.clip_model is None or model_state.clip_processor is None:
-        raise HTTPException(
+def _not_ready(what: str) -> HTTPException:
+    if model_state.loading:
+        # models load in the background after startup (MODEL_LOAD_BACKGROUND)
+        return HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="CLIP router is not ready." + _startup_error_suffix(),
+            detail=f"{what} is still loading. Please retry later.",
+            headers={"Retry-After": str(MODEL_RETRY_AFTER_S)},
         )
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=f"{what} is not ready." + _startup_error_suffix(),
+    )
+
+
+def require_clip_ready() -> None:
+    # CLIP is required by ClipRouter constructor; the services on app.state
+    # exist once the startup warm-up is done
+    if (
+        not model_state.warm
+        or model_state.clip_model is None
+        or model_state.clip_processor is None
+    ):
+        raise _not_ready("CLIP router")
 
 
 def require_food_ready() -> None:
     # FoodPipeline constructor checks these
     if (
-        model_state.model is None
+        not model_state.warm
+        or model_state.model is None
         or model_state.preprocess is None
         or model_state.classes is None
     ):
-        raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Food model is not ready." + _startup_error_suffix(),
-        )
+        raise _not_ready("Food model")
 
 
 async def require_blip_ready() -> None:
     try:
-        await ensure_blip_loaded()
+        await ensure_blip_loaded(timeout=settings.BLIP_LOAD_WAIT_S)
+    except asyncio.TimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="BLIP-VQA is still loading. Please retry later.",
+            headers={"Retry-After": str(BLIP_RETRY_AFTER_S)},
+        ) from e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -8,10 +8,14 @@ class ModelState:
     model: Optional[Any] = None
     preprocess: Optional[Any] = None
     classes: Optional[List[str]] = None
+    # backend | artifact fingerprint | compile mode (cache keys)
+    food_model_version: str = ""
 
     # clip router
     clip_model: Optional[Any] = None
     clip_processor: Optional[Any] = None
+    # traced / compiled image tower (MODEL_COMPILE); None = use clip_model
+    clip_image_encoder: Optional[Any] = None
 
     # blip vqa
     blip_vqa_model: Optional[Any] = None
@@ -20,6 +24,14 @@ class ModelState:
     # device
     device: str = "cpu"
 
+    # shorter side images are decoded down to (largest model input); 0 = full
+    decode_side: int = 0
+
+    # dummy batches have been run through the loaded models
+    warm: bool = False
+    # startup model load / warm-up is running
+    loading: bool = False
+
     error: Optional[str] = None
 
 
@@ -0,0 +1,143 @@
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from app.core.state import model_state
+
+logger = logging.getLogger("app.timing")
+
+
+class RequestTimings:
+    """
+    Per-request breakdown (SERVER_TIMING=1): stage durations recorded by the
+    pipeline stage() timers, plus notes such as cache hits and the batch size
+    the request was coalesced into.
+    """
+
+    def __init__(self, endpoint: str) -> None:
+        self.endpoint = endpoint
+        self.session_id: Optional[str] = None
+        self.device = model_state.device
+        self.t0 = time.perf_counter()
+        # stage -> [total seconds, count]
+        self.stages: Dict[str, List[float]] = {}
+        self.notes: Dict[str, Any] = {}
+
+    def add_stage(self, name: str, seconds: float) -> None:
+        entry = self.stages.get(name)
+        if entry is None:
+            self.stages[name] = [seconds, 1]
+        else:
+            entry[0] += seconds
+            entry[1] += 1
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.t0
+
+    def server_timing(self) -> str:
+        parts = []
+        for name, (seconds, count) in self.stages.items():
+            part = f"{name};dur={seconds * 1000:.1f}"
+            if count > 1:
+                part += f';desc="x{count}"'
+            parts.append(part)
+        parts.append(f'device;desc="{self.device}"')
+        for key, value in self.notes.items():
+            parts.append(f'{key};desc="{value}"')
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+    def log_record(self, status_code: Optional[int]) -> Dict[str, Any]:
+        return {
+            "event": "request_timing",
+            "endpoint": self.endpoint,
+            "session_id": self.session_id,
+            "status": status_code,
+            "device": self.device,
+            "total_ms": round(self.elapsed() * 1000, 1),
+            "stages_ms": {
+                name: round(seconds * 1000, 1)
+                for name, (seconds, _) in self.stages.items()
+            },
+            "stage_counts": {
+                name: int(count)
+                for name, (_, count) in self.stages.items()
+                if count > 1
+            },
+            **self.notes,
+        }
+
+
+_current: ContextVar[Optional[RequestTimings]] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def current_timings() -> Optional[RequestTimings]:
+    return _current.get()
+
+
+def note(key: str, value: Any) -> None:
+    # no-op outside a timed request (SERVER_TIMING=0)
+    timings = _current.get()
+    if timings is not None:
+        timings.notes[key] = value
+
+
+def set_session(session_id: Optional[str]) -> None:
+    timings = _current.get()
+    if timings is not None and session_id:
+        timings.session_id = session_id
+
+
+class TimingMiddleware:
+    """
+    ASGI middleware for the timed endpoints: installs a RequestTimings for
+    the request, adds the Server-Timing header when the response starts and
+    logs one JSON line when it is finished. Streamed responses only carry
+    the stages done before streaming started in the header; the log line has
+    all of them.
+    """
+
+    def __init__(self, app, paths: List[str]) -> None:
+        self.app = app
+        self.paths = set(paths)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings(scope["path"])
+        token = _current.set(timings)
+        status_code: Optional[int] = None
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", timings.server_timing().encode("latin-1"))
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            _log(timings.log_record(status_code))
+
+
+def _log(record: Dict[str, Any]) -> None:
+    if not logger.handlers:
+        # uvicorn only configures its own loggers
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    logger.info(json.dumps(record, ensure_ascii=False, default=str))
@@ -1,9 +1,14 @@
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
-from PIL import Image
+import torch
 
+from app.core.batching import MicroBatcher
+from app.core.config import settings
+from app.core.executor import inference_executor
+from app.core.metrics import stage
 from app.core.state import model_state
-from app.infra.predict_food import predict_with
+from app.infra.predict_food import predict_batch_with, predict_tensors
+from app.infra.preprocess import ImageInput, PreparedImage, TensorPreprocess, pil_of
 
 
 class FoodPipeline:
@@ -18,12 +23,58 @@ class FoodPipeline:
         self.model = model_state.model
         self.preprocess = model_state.preprocess
         self.classes = model_state.classes
+        # same Resize/CenterCrop/Normalize, applied to PreparedImage tensors
+        self.tensor_preprocess = TensorPreprocess.from_torchvision(self.preprocess)
 
-    def analyze(self, image: Image.Image, top_k: int = 3) -> Dict[str, Any]:
-        preds = predict_with(
-            self.model, self.preprocess, self.classes, image, top_k=top_k
+        # concurrent analyze() calls are coalesced into one forward pass
+        self.batcher: MicroBatcher[Tuple[ImageInput, int], List[Dict]] = MicroBatcher(
+            self._predict_batch,
+            lane="food",
+            max_batch_size=settings.FOOD_BATCH_MAX_SIZE,
+            max_wait_ms=settings.FOOD_BATCH_MAX_WAIT_MS,
         )
 
+    async def analyze(self, image: ImageInput, top_k: int = 3) -> Dict[str, Any]:
+        with stage("food"):
+            if self.batcher.max_batch_size <= 1:
+                return await inference_executor.run(
+                    "food", self.analyze_sync, image, top_k
+                )
+
+            preds = await self.batcher.submit((image, top_k))
+            return self._normalize(preds)
+
+    def analyze_sync(self, image: ImageInput, top_k: int = 3) -> Dict[str, Any]:
+        return self._normalize(self._predict_batch([(image, top_k)])[0])
+
+    def warm_up(self, image: ImageInput, batch_sizes: List[int]) -> None:
+        for n in batch_sizes:
+            self._predict_batch([(image, 1)] * n)
+
+    def _predict_batch(self, items: List[Tuple[ImageInput, int]]) -> List[List[Dict]]:
+        # one forward pass at the largest requested k, then trim per caller
+        max_k = max(k for _, k in items)
+        images = [image for image, _ in items]
+
+        if self.tensor_preprocess is not None and all(
+            isinstance(image, PreparedImage) for image in images
+        ):
+            x = torch.stack(
+                [image.input_for(self.tensor_preprocess) for image in images]
+            )
+            preds = predict_tensors(self.model, self.classes, x, top_k=max_k)
+        else:
+            preds = predict_batch_with(
+                self.model,
+                self.preprocess,
+                self.classes,
+                [pil_of(image) for image in images],
+                top_k=max_k,
+            )
+        return [p[: max(1, int(k))] for p, (_, k) in zip(preds, items)]
+
+    @staticmethod
+    def _normalize(preds: List[Dict]) -> Dict[str, Any]:
         normalized = []
         for i, p in enumerate(preds, start=1):
             normalized.append(
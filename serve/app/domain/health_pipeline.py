@@ -1,11 +1,13 @@
 from typing import Dict, List
 
-from PIL import Image
-
 from app.core.config import settings
-from app.domain.vision_router_service import MEDICINE_KEY, MED_REPORT_KEY
+from app.core.executor import inference_executor
+from app.core.metrics import stage
+from app.domain.labels import MEDICINE_KEY, MED_REPORT_KEY
 from app.domain.vqa_questions import GENERIC, MEDICINE, MED_REPORT, WOUND, VQAQuestion
-from app.infra.blip_vqa import BlipVQA, ensure_blip_loaded
+from app.infra.blip_loader import ensure_blip_loaded
+from app.infra.blip_vqa import BlipVQA
+from app.infra.preprocess import ImageInput
 
 
 def select_questions(clip_best_key: str) -> List[str]:
@@ -68,7 +70,7 @@ class HealthPipeline:
     def __init__(self):
         self.vqa = None
 
-    async def analyze(self, image: Image.Image, clip_best_key: str) -> Dict:
+    async def analyze(self, image: ImageInput, clip_best_key: str) -> Dict:
         # choosing questions based on CLIP's best guess
         questions = select_questions(clip_best_key)
 
@@ -76,7 +78,10 @@ class HealthPipeline:
         if self.vqa is None:
             self.vqa = BlipVQA()
 
-        answers = self.vqa.ask_many(image, questions)
+        with stage("blip_vqa"):
+            answers = await inference_executor.run(
+                "blip", self.vqa.ask_many, image, questions
+            )
         context = build_structured_context(answers)
 
         return {
@@ -0,0 +1,17 @@
+from typing import Dict
+
+# Canonical label keys (stable)
+FOOD_KEY = "food"
+MEDICINE_KEY = "medicine"
+MED_REPORT_KEY = "medical_document"
+FACE_KEY = "face"
+GENERIC_KEY = "generic_object"
+
+# Consistent CLIP prompts (same template)
+LABEL_PROMPTS: Dict[str, str] = {
+    FOOD_KEY: "a photo of delicious food",
+    MEDICINE_KEY: "a photo of medicine pills or a blister pack",
+    MED_REPORT_KEY: "a photo of a medical report document",
+    FACE_KEY: "a photo of a human face",
+    GENERIC_KEY: "a photo of a generic object",
+}
@@ -1,8 +1,15 @@
+import asyncio
 import json
 import re
-from typing import Any, Dict, List, Tuple
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import stage
 from app.domain.llm_intents import ALLOWED_INTENTS
+from app.domain.llm_stream import IncrementalLLMJsonParser
 from app.infra.llm_ollama import OllamaClient
 
 SYSTEM_PROMPT = """You are an AI Health & Nutrition Assistant.
@@ -30,6 +37,13 @@ SYSTEM_PROMPT = """You are an AI Health & Nutrition Assistant.
 - No extra keys. No explanations outside JSON.
 """
 
+# Static prefix of every prompt, shared with the warm-up call. Ollama only
+# reuses its cached prefill while this stays byte-identical (no per-request
+# data, no timestamps) and first; all dynamic content goes into the user
+# message. inference_llm_tokens{phase="prompt_eval"} shows how much of each
+# prompt was evaluated rather than reused.
+SYSTEM_MESSAGE: Dict[str, str] = {"role": "system", "content": SYSTEM_PROMPT}
+
 
 def build_messages(
     user_message: str, user_context: Dict[str, Any], analyzed_image: Dict[str, Any]
@@ -53,10 +67,7 @@ USER_CONTEXT:
 VISION_CONTEXT:
 {vision_context}
 """
-    return [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {"role": "user", "content": user_block},
-    ]
+    return [SYSTEM_MESSAGE, {"role": "user", "content": user_block}]
 
 
 def _extract_json_object(s: str) -> str:
@@ -85,9 +96,80 @@ def parse_llm_json(raw: str) -> Tuple[str, str]:
     return intent, text
 
 
+def finalize_llm_output(raw: str) -> Tuple[str, str]:
+    try:
+        return parse_llm_json(raw)
+    except Exception:
+        safe_text = raw.strip()
+        if not safe_text:
+            safe_text = "Mình chưa đủ thông tin để trả lời. Bạn có thể mô tả rõ hơn giúp mình không?"
+        return "unknown", safe_text
+
+
 class LLMEngine:
-    def __init__(self):
-        self.client = OllamaClient()
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None):
+        self.client = OllamaClient(client=http_client)
+
+        # model residency (warm-up + keep-warm pings)
+        self._last_used = time.monotonic()
+        self._tasks: List[asyncio.Task] = []
+        self.warm = False
+        self.keep_warm_pings = 0
+        self.last_error: Optional[str] = None
+
+    def start(self) -> None:
+        """
+        Schedule the startup warm-up and the idle keep-warm loop (non-blocking:
+        Ollama may still be starting next to us).
+        """
+        loop = asyncio.get_running_loop()
+        if settings.OLLAMA_WARMUP:
+            self._tasks.append(loop.create_task(self.warm_up()))
+        if settings.OLLAMA_KEEP_WARM_INTERVAL_S > 0:
+            self._tasks.append(loop.create_task(self._keep_warm_loop()))
+
+    async def aclose(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def warm_up(self) -> None:
+        """
+        Load the model and prefill the static system prompt so the first real
+        request neither pays the model load nor the system-prompt prefill.
+        """
+        messages = [SYSTEM_MESSAGE, {"role": "user", "content": "ping"}]
+        try:
+            await self.client.chat(messages, temperature=0.2, num_predict=1)
+            self.warm = True
+            self.last_error = None
+        except Exception as e:
+            self.last_error = f"warm-up failed: {e}"
+
+    async def _keep_warm_loop(self) -> None:
+        interval = settings.OLLAMA_KEEP_WARM_INTERVAL_S
+        while True:
+            await asyncio.sleep(interval)
+            if time.monotonic() - self._last_used < interval:
+                continue  # real traffic is keeping the model resident
+            try:
+                await self.client.load_model()
+                self.keep_warm_pings += 1
+                self.last_error = None
+            except Exception as e:
+                self.last_error = f"keep-warm failed: {e}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "model": self.client.model,
+            "keep_alive": self.client.keep_alive,
+            "warm": self.warm,
+            "keep_warm_pings": self.keep_warm_pings,
+            "idle_s": round(time.monotonic() - self._last_used, 1),
+            "usage": self.client.usage.as_dict(),
+            "last_error": self.last_error,
+        }
 
     async def generate_intent_and_text(
         self,
@@ -96,12 +178,39 @@ class LLMEngine:
         analyzed_image: Dict[str, Any],
     ) -> Tuple[str, str]:
         messages = build_messages(user_message, user_context, analyzed_image)
-        raw = await self.client.chat(messages, temperature=0.2)
+        self._last_used = time.monotonic()
+        with stage("ollama"):
+            raw = await self.client.chat(messages, temperature=0.2)
+        with stage("llm_parse"):
+            return finalize_llm_output(raw)
 
-        try:
-            return parse_llm_json(raw)
-        except Exception:
-            safe_text = raw.strip()
-            if not safe_text:
-                safe_text = "Mình chưa đủ thông tin để trả lời. Bạn có thể mô tả rõ hơn giúp mình không?"
-            return "unknown", safe_text
+    async def stream_intent_and_text(
+        self,
+        user_message: str,
+        user_context: Dict[str, Any],
+        analyzed_image: Dict[str, Any],
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant. Yields:
+        - ("intent", str) once the intent string has been generated
+        - ("delta", str) for each decoded piece of text_response
+        - ("final", (intent, text)) at the end, same result as the non-streaming call
+        """
+        messages = build_messages(user_message, user_context, analyzed_image)
+        self._last_used = time.monotonic()
+        parser = IncrementalLLMJsonParser()
+        intent_sent = False
+
+        with stage("ollama"):
+            async for chunk in self.client.chat_stream(messages, temperature=0.2):
+                delta = parser.feed(chunk)
+                if not intent_sent and parser.intent is not None:
+                    intent_sent = True
+                    intent = parser.intent
+                    yield "intent", intent if intent in ALLOWED_INTENTS else "unknown"
+                if delta:
+                    yield "delta", delta
+
+        with stage("llm_parse"):
+            final = finalize_llm_output(parser.raw.strip())
+        yield "final", final
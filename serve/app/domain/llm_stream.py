@@ -0,0 +1,154 @@
+import re
+from typing import List, Optional, Tuple
+
+_SIMPLE_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+_HEX4_RE = re.compile(r"[0-9a-fA-F]{4}")
+
+
+class _KeyScanner:
+    """
+    Finds the opening quote of a `"key": "..."` string value in a growing
+    buffer. Only text after the last search, plus a trailing partial match,
+    is searched again, so a long stream is scanned once rather than per chunk.
+    """
+
+    def __init__(self, key: str) -> None:
+        quoted = re.escape(f'"{key}"')
+        prefixes = "|".join(
+            re.escape(f'"{key}"'[:n]) for n in range(len(key) + 2, 0, -1)
+        )
+        self._match_re = re.compile(quoted + r'\s*:\s*"')
+        self._partial_re = re.compile(rf"(?:{quoted}\s*(?::\s*)?|{prefixes})\Z")
+        self._pos = 0
+
+    def find(self, raw: str) -> Optional[int]:
+        """
+        Index in `raw` just after the value's opening quote, or None.
+        """
+        m = self._match_re.search(raw, self._pos)
+        if m:
+            return m.end()
+        partial = self._partial_re.search(raw, self._pos)
+        self._pos = partial.start() if partial else len(raw)
+        return None
+
+
+def _decode(raw: str, i: int) -> Tuple[str, int, bool]:
+    """
+    Decodes JSON string contents from raw[i:] up to the closing quote.
+
+    Returns (text, next index, closed). Stops before an escape sequence that
+    is split at the end of `raw`, so it can resume there with more data.
+    Malformed escapes never raise: they are kept as written or replaced.
+    """
+    out = []
+    closed = False
+    while i < len(raw):
+        c = raw[i]
+        if c == '"':
+            closed = True
+            i += 1
+            break
+        if c != "\\":
+            out.append(c)
+            i += 1
+            continue
+
+        # escape sequence: wait for the rest if it is split across chunks
+        if i + 1 >= len(raw):
+            break
+        e = raw[i + 1]
+        if e == "u":
+            if i + 6 > len(raw):
+                break
+            if not _HEX4_RE.fullmatch(raw, i + 2, i + 6):
+                # not an escape the model meant (e.g. "C:\users"): keep
+                # the characters as written
+                out.append(raw[i : i + 2])
+                i += 2
+                continue
+            code = int(raw[i + 2 : i + 6], 16)
+            if 0xDC00 <= code < 0xE000:
+                # low surrogate without a high one
+                out.append("\ufffd")
+                i += 6
+                continue
+            if 0xD800 <= code < 0xDC00:
+                # surrogate pair (e.g. emoji) needs the second \uXXXX as well
+                paired = raw.startswith("\\u", i + 6)
+                if i + 8 > len(raw) or (paired and i + 12 > len(raw)):
+                    break
+                low = (
+                    int(raw[i + 8 : i + 12], 16)
+                    if paired and _HEX4_RE.fullmatch(raw, i + 8, i + 12)
+                    else None
+                )
+                if low is None or not 0xDC00 <= low < 0xE000:
+                    # lone high surrogate: not encodable, replace it and
+                    # decode what follows on its own
+                    out.append("\ufffd")
+                    i += 6
+                    continue
+                out.append(chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)))
+                i += 12
+                continue
+            out.append(chr(code))
+            i += 6
+            continue
+        out.append(_SIMPLE_ESCAPES.get(e, e))
+        i += 2
+
+    return "".join(out), i, closed
+
+
+class IncrementalLLMJsonParser:
+    """
+    Pulls fields out of the LLM's JSON reply while it is still streaming.
+
+    feed() returns the newly decoded characters of "text_response" so they can
+    be forwarded to the client immediately; `intent` becomes available as soon
+    as the "intent_detected" string is complete. The final, authoritative
+    result should still come from parse_llm_json() on the full text.
+    """
+
+    def __init__(self) -> None:
+        self.raw = ""
+        self.intent: Optional[str] = None
+        self._intent_key = _KeyScanner("intent_detected")
+        self._intent_pos: Optional[int] = None  # next undecoded index
+        self._intent_parts: List[str] = []
+        self._text_key = _KeyScanner("text_response")
+        self._pos: Optional[int] = None  # next undecoded index inside the text
+        self._done = False
+
+    def feed(self, chunk: str) -> str:
+        self.raw += chunk
+
+        if self.intent is None:
+            if self._intent_pos is None:
+                self._intent_pos = self._intent_key.find(self.raw)
+            if self._intent_pos is not None:
+                part, self._intent_pos, closed = _decode(self.raw, self._intent_pos)
+                self._intent_parts.append(part)
+                if closed:
+                    self.intent = "".join(self._intent_parts).strip()
+
+        if self._pos is None:
+            self._pos = self._text_key.find(self.raw)
+            if self._pos is None:
+                return ""
+
+        if self._done:
+            return ""
+        text, self._pos, self._done = _decode(self.raw, self._pos)
+        return text
@@ -1,4 +1,4 @@
-from app.domain.vision_router_service import MEDICINE_KEY, MED_REPORT_KEY, FACE_KEY
+from app.domain.labels import MEDICINE_KEY, MED_REPORT_KEY, FACE_KEY
 
 
 def to_routing_hint(is_food: bool, best_key: str | None) -> str:
@@ -0,0 +1,81 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from app.core.config import settings
+
+D = TypeVar("D")
+T = TypeVar("T")
+
+
+class SpeculativeFood:
+    """
+    Runs food classification concurrently with CLIP routing (on the food
+    lane, next to the router on the clip lane) instead of after it.
+
+    Most images are food, so the food result is usually ready when the router
+    decides; for non-food images it is cancelled or discarded. The counters
+    tell how much food-model work speculation wastes.
+    """
+
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self.launched = 0
+        self.used = 0
+        # router said non-food: cancelled before it finished / finished anyway
+        self.cancelled = 0
+        self.wasted = 0
+
+    async def route_and_classify(
+        self,
+        route: Callable[[], Awaitable[D]],
+        classify: Callable[[], Awaitable[T]],
+        speculate: bool = True,
+    ) -> Tuple[D, Optional[T]]:
+        """
+        Returns (decision, food result or None).
+
+        None means classification did not run speculatively (disabled,
+        `speculate` False or non-food); the caller runs it itself if needed.
+        """
+        if not (self.enabled and speculate):
+            return await route(), None
+
+        food_task = asyncio.ensure_future(classify())
+        self.launched += 1
+        try:
+            decision = await route()
+        except BaseException:
+            await self._discard(food_task)
+            raise
+
+        if not getattr(decision, "is_food", False):
+            await self._discard(food_task)
+            return decision, None
+
+        self.used += 1
+        return decision, await food_task
+
+    async def _discard(self, task: "asyncio.Future[Any]") -> None:
+        if task.done():
+            self.wasted += 1
+        else:
+            self.cancelled += 1
+            task.cancel()
+        # consume the result / error so it is never reported as unretrieved
+        await asyncio.gather(task, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        discarded = self.cancelled + self.wasted
+        return {
+            "enabled": self.enabled,
+            "launched": self.launched,
+            "used": self.used,
+            "cancelled": self.cancelled,
+            "wasted": self.wasted,
+            "waste_ratio": (
+                round(discarded / self.launched, 4) if self.launched else 0.0
+            ),
+        }
+
+
+speculative_food = SpeculativeFood(enabled=settings.SPECULATIVE_FOOD)
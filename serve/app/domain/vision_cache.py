@@ -0,0 +1,135 @@
+import asyncio
+import copy
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from PIL import Image
+
+from app.core.cache import CacheBackend, InMemoryLRUCache
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+from app.core.state import model_state
+from app.infra.quantize import quantization_mode
+from app.core.timing import note
+from app.domain.labels import LABEL_PROMPTS
+
+T = TypeVar("T")
+
+
+def image_digest(image: Image.Image) -> str:
+    """
+    Content hash of the decoded pixels (mode + size + raw bytes), so the same
+    photo re-sent under a different URL still hits.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.mode}:{image.size[0]}x{image.size[1]}:".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+def _model_versions() -> Dict[str, str]:
+    prompts = json.dumps(LABEL_PROMPTS, sort_keys=True)
+    # QUANTIZE applies to CLIP and BLIP-VQA; VQA_BATCHED changes how BLIP
+    # decodes, so both can change the cached results
+    quantization = quantization_mode(model_state.device) or "none"
+    return {
+        "route": "|".join(
+            [
+                settings.CLIP_MODEL_NAME,
+                hashlib.sha1(prompts.encode()).hexdigest()[:12],
+                str(settings.FOOD_THRESHOLD),
+                str(settings.FOOD_MARGIN),
+                quantization,
+            ]
+        ),
+        "food": model_state.food_model_version,
+        "health": "|".join(
+            [
+                settings.BLIP_VQA_MODEL_NAME,
+                str(settings.VQA_MAX_QUESTIONS),
+                quantization,
+                str(settings.VQA_BATCHED),
+            ]
+        ),
+    }
+
+
+class VisionCache:
+    """
+    Caches RouteDecision / FoodPipeline.analyze / HealthPipeline.analyze
+    results by image digest, model/prompt version and call parameters.
+    """
+
+    def __init__(self, backend: CacheBackend, enabled: bool = True) -> None:
+        self.backend = backend
+        self.enabled = enabled
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+
+    def key(self, kind: str, digest: str, **params: Any) -> str:
+        version = _model_versions().get(kind, "")
+        extra = ",".join(f"{k}={params[k]}" for k in sorted(params))
+        return f"vision:{kind}:{version}:{digest}:{extra}"
+
+    async def digest(self, image: Image.Image) -> Optional[str]:
+        if not self.enabled:
+            return None
+        return await asyncio.to_thread(image_digest, image)
+
+    async def get_or_compute(
+        self,
+        kind: str,
+        digest: Optional[str],
+        compute: Callable[[], Awaitable[T]],
+        **params: Any,
+    ) -> T:
+        if not self.enabled or digest is None:
+            return await compute()
+
+        key = self.key(kind, digest, **params)
+        cached = self.backend.get(key)
+        if cached is not None:
+            self.hits[kind] = self.hits.get(kind, 0) + 1
+            CACHE_LOOKUPS.inc(cache=f"vision_{kind}", result="hit")
+            note(f"{kind}_cache", "hit")
+            return copy.deepcopy(cached)
+
+        self.misses[kind] = self.misses.get(kind, 0) + 1
+        CACHE_LOOKUPS.inc(cache=f"vision_{kind}", result="miss")
+        note(f"{kind}_cache", "miss")
+        value = await compute()
+        self.backend.set(key, copy.deepcopy(value))
+        return value
+
+    def peek(self, kind: str, digest: Optional[str], **params: Any) -> Optional[Any]:
+        """
+        The cached value get_or_compute would return, without counting a
+        lookup. Not a copy: read it, don't modify it.
+        """
+        if not self.enabled or digest is None:
+            return None
+        return self.backend.get(self.key(kind, digest, **params))
+
+    def contains(self, kind: str, digest: Optional[str], **params: Any) -> bool:
+        """
+        Whether get_or_compute would hit, without counting a lookup.
+        """
+        return self.peek(kind, digest, **params) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "backend": self.backend.stats(),
+        }
+
+
+vision_cache = VisionCache(
+    InMemoryLRUCache(
+        max_entries=settings.VISION_CACHE_MAX_ENTRIES,
+        ttl_s=settings.VISION_CACHE_TTL_S,
+    ),
+    enabled=settings.VISION_CACHE_ENABLED,
+)
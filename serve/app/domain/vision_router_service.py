@@ -4,26 +4,35 @@ from dataclasses import dataclass
 from typing import Dict, List, Tuple, Optional
 
 import torch
-from PIL import Image
 
+from app.core.batching import MicroBatcher
 from app.core.config import settings
+from app.core.executor import inference_executor
+from app.core.metrics import stage
 from app.core.state import model_state
+from app.domain.labels import FOOD_KEY, LABEL_PROMPTS
+from app.infra.preprocess import ImageInput, PreparedImage, TensorPreprocess, pil_of
 
-# Canonical label keys (stable)
-FOOD_KEY = "food"
-MEDICINE_KEY = "medicine"
-MED_REPORT_KEY = "medical_document"
-FACE_KEY = "face"
-GENERIC_KEY = "generic_object"
 
-# Consistent CLIP prompts (same template)
-LABEL_PROMPTS: Dict[str, str] = {
-    FOOD_KEY: "a photo of delicious food",
-    MEDICINE_KEY: "a photo of medicine pills or a blister pack",
-    MED_REPORT_KEY: "a photo of a medical report document",
-    FACE_KEY: "a photo of a human face",
-    GENERIC_KEY: "a photo of a generic object",
-}
+def _features(out) -> torch.Tensor:
+    # get_*_features returns a tensor in older transformers, a model output in newer
+    if isinstance(out, torch.Tensor):
+        return out
+    return out.pooler_output
+
+
+class ClipImageEncoder(torch.nn.Module):
+    """
+    pixel_values -> image embeddings, as a plain module so it can be traced
+    or compiled on its own (the text tower only runs at startup).
+    """
+
+    def __init__(self, clip_model: torch.nn.Module) -> None:
+        super().__init__()
+        self.clip_model = clip_model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return _features(self.clip_model.get_image_features(pixel_values))
 
 
 @dataclass
@@ -58,23 +67,88 @@ class VisionRouterService:
 
         # Make sure the model is in eval mode
         self.model.eval()
+        # traced / compiled at startup if MODEL_COMPILE is set
+        self.image_encoder = model_state.clip_image_encoder
+        if self.image_encoder is None:
+            self.image_encoder = ClipImageEncoder(self.model)
+
+        # tensor-level CLIP preprocessing for PreparedImage inputs
+        self.tensor_preprocess = TensorPreprocess.from_hf(self.processor)
+
+        # Text side is constant: encode the prompts once, keep them on device.
+        # (prompts, keys, normalized text embeds) is swapped as one tuple so
+        # concurrent route calls never see a half-updated table.
+        self._text_cache: Tuple[Tuple[Tuple[str, str], ...], List[str], torch.Tensor]
+        self.refresh_prompts()
+
+        # concurrent route() calls are coalesced into one image-tower pass
+        self.batcher: MicroBatcher[ImageInput, RouteDecision] = MicroBatcher(
+            self.route_batch_sync,
+            lane="clip",
+            max_batch_size=settings.CLIP_BATCH_MAX_SIZE,
+            max_wait_ms=settings.CLIP_BATCH_MAX_WAIT_MS,
+        )
 
     @torch.inference_mode()
-    def route(self, image: Image.Image) -> RouteDecision:
-        keys: List[str] = list(LABEL_PROMPTS.keys())
-        texts: List[str] = [LABEL_PROMPTS[k] for k in keys]
+    def refresh_prompts(self) -> None:
+        """
+        (Re)encode LABEL_PROMPTS through the CLIP text tower and cache the
+        L2-normalized embedding matrix (num_labels, dim).
+        """
+        prompts = tuple(LABEL_PROMPTS.items())
+        keys = [k for k, _ in prompts]
+        texts = [t for _, t in prompts]
+
+        text_inputs = self.processor(text=texts, return_tensors="pt", padding=True).to(
+            self.device
+        )
+        text_embeds = _features(self.model.get_text_features(**text_inputs))
+
+        text_embeds = text_embeds / text_embeds.norm(dim=-1, keepdim=True)
+        self._text_cache = (prompts, keys, text_embeds)
 
-        inputs = self.processor(
-            text=texts,
-            images=image,
-            return_tensors="pt",
-            padding=True,
-        ).to(self.device)
+    def warm_up(self, image: ImageInput, batch_sizes: List[int]) -> None:
+        for n in batch_sizes:
+            self.route_batch_sync([image] * n)
 
-        outputs = self.model(**inputs)
-        logits_per_image = outputs.logits_per_image  # (1, num_labels)
-        probs = logits_per_image.softmax(dim=1)[0].detach().cpu().tolist()
+    async def route(self, image: ImageInput) -> RouteDecision:
+        with stage("clip_route"):
+            if self.batcher.max_batch_size <= 1:
+                return await inference_executor.run("clip", self.route_sync, image)
+            return await self.batcher.submit(image)
 
+    def route_sync(self, image: ImageInput) -> RouteDecision:
+        return self.route_batch_sync([image])[0]
+
+    @torch.inference_mode()
+    def route_batch_sync(self, images: List[ImageInput]) -> List[RouteDecision]:
+        # prompt table edited at runtime -> re-encode before scoring
+        if self._text_cache[0] != tuple(LABEL_PROMPTS.items()):
+            self.refresh_prompts()
+        _, keys, text_embeds = self._text_cache
+
+        if self.tensor_preprocess is not None and all(
+            isinstance(image, PreparedImage) for image in images
+        ):
+            pixel_values = torch.stack(
+                [image.input_for(self.tensor_preprocess) for image in images]
+            )
+        else:
+            pixel_values = self.processor(
+                images=[pil_of(image) for image in images], return_tensors="pt"
+            )["pixel_values"]
+        pixel_values = pixel_values.to(self.device)
+        image_embeds = self.image_encoder(pixel_values)
+        image_embeds = image_embeds / image_embeds.norm(dim=-1, keepdim=True)
+
+        # same as CLIPModel.forward().logits_per_image, without the text tower
+        logit_scale = self.model.logit_scale.exp()
+        logits_per_image = logit_scale * image_embeds @ text_embeds.t()
+        probs = logits_per_image.softmax(dim=1).detach().cpu().tolist()
+        return [self._decide(keys, row) for row in probs]
+
+    @staticmethod
+    def _decide(keys: List[str], probs: List[float]) -> RouteDecision:
         score_by_key: Dict[str, float] = {k: float(p) for k, p in zip(keys, probs)}
         sorted_scores: List[Tuple[str, float]] = sorted(
             score_by_key.items(), key=lambda x: x[1], reverse=True
@@ -0,0 +1,121 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import MODEL_LOAD_SECONDS
+from app.core.state import model_state
+from app.infra.quantize import quantization_mode, quantize_int8
+from app.infra.weights import from_pretrained_mmap
+
+
+class BlipLoader:
+    """
+    Loads BLIP-VQA (processor + several hundred MB of weights) once, in a
+    worker thread so the event loop keeps serving, and tracks progress for
+    /health. A failed load is retried by start() once `retry_s` has passed.
+    """
+
+    retry_s = 30.0
+
+    def __init__(self) -> None:
+        self.state = "not_loaded"  # not_loaded | loading | loaded | failed
+        self.phase: Optional[str] = None
+        self.error: Optional[str] = None
+        self.load_s: Optional[float] = None
+        self._started_at: Optional[float] = None
+        self._failed_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Start loading in a worker thread, unless it is loaded, already loading
+        or failed less than `retry_s` ago.
+        """
+        if self.state == "not_loaded" or (
+            self.state == "failed"
+            and time.perf_counter() - self._failed_at >= self.retry_s
+        ):
+            self.state = "loading"
+            self.error = None
+            self._task = asyncio.create_task(asyncio.to_thread(self.load_blocking))
+
+    async def wait(self, timeout: Optional[float] = None) -> None:
+        self.start()
+        if self.state == "loading" and self._task is not None:
+            # shield: a caller giving up must not cancel the shared load
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+
+    def load_blocking(self) -> None:
+        """
+        Load in the calling thread: start() runs it in a worker thread, the
+        prefork master (app.serve) calls it before forking.
+        """
+        self.state = "loading"
+        self._started_at = time.perf_counter()
+        try:
+            self._load_sync()
+        except Exception as e:
+            self.state = "failed"
+            self.error = str(e)
+            self._failed_at = time.perf_counter()
+            return
+        self.load_s = time.perf_counter() - self._started_at
+        MODEL_LOAD_SECONDS.set(self.load_s, model="blip")
+        self.state = "loaded"
+
+    def _load_sync(self) -> None:
+        # the ML stack is imported here, not at module level (see app.main)
+        from transformers import BlipForQuestionAnswering, BlipProcessor
+
+        self.phase = "processor"
+        processor = BlipProcessor.from_pretrained(settings.BLIP_VQA_MODEL_NAME)
+        self.phase = "weights"
+        model = from_pretrained_mmap(
+            BlipForQuestionAnswering, settings.BLIP_VQA_MODEL_NAME
+        )
+        model.eval()
+        self.phase = "device"
+        model.to(model_state.device)
+        if quantization_mode(model_state.device) == "int8":
+            self.phase = "quantize"
+            quantize_int8(model)
+        self.phase = None
+
+        model_state.blip_vqa_processor = processor
+        model_state.blip_vqa_model = model
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = (
+            time.perf_counter() - self._started_at
+            if self.state == "loading" and self._started_at is not None
+            else None
+        )
+        return {
+            "policy": settings.BLIP_LOAD_POLICY,
+            "state": self.state,
+            "phase": self.phase,
+            "elapsed_s": round(elapsed, 2) if elapsed is not None else None,
+            "load_s": round(self.load_s, 2) if self.load_s is not None else None,
+            "error": self.error,
+        }
+
+
+blip_loader = BlipLoader()
+
+
+async def ensure_blip_loaded(timeout: Optional[float] = None) -> None:
+    """
+    Start loading BLIP-VQA if needed and wait for it, at most `timeout`
+    seconds (None = until done; 0 = don't wait). Raises asyncio.TimeoutError
+    if it is still loading, RuntimeError if the load failed.
+    """
+    if (
+        model_state.blip_vqa_model is not None
+        and model_state.blip_vqa_processor is not None
+    ):
+        return
+
+    await blip_loader.wait(timeout)
+    if blip_loader.state == "failed":
+        raise RuntimeError(blip_loader.error)
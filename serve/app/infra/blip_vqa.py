@@ -1,42 +1,11 @@
-import asyncio
-from typing import List, Dict
+from typing import Dict, List
 
 import torch
-from PIL import Image
-from transformers import BlipForQuestionAnswering, BlipProcessor
 
 from app.core.config import settings
+from app.core.metrics import stage
 from app.core.state import model_state
-
-_blip_load_lock = asyncio.Lock()
-
-
-async def ensure_blip_loaded() -> None:
-    """
-    Lazy-load BLIP-VQA the first time it is needed.
-    Safe under concurrency via asyncio lock.
-    """
-    if (
-        model_state.blip_vqa_model is not None
-        and model_state.blip_vqa_processor is not None
-    ):
-        return
-
-    async with _blip_load_lock:
-        # double-check inside lock
-        if (
-            model_state.blip_vqa_model is not None
-            and model_state.blip_vqa_processor is not None
-        ):
-            return
-
-        processor = BlipProcessor.from_pretrained(settings.BLIP_VQA_MODEL_NAME)
-        model = BlipForQuestionAnswering.from_pretrained(settings.BLIP_VQA_MODEL_NAME)
-        model.eval()
-        model.to(model_state.device)
-
-        model_state.blip_vqa_processor = processor
-        model_state.blip_vqa_model = model
+from app.infra.preprocess import ImageInput, PreparedImage, TensorPreprocess, pil_of
 
 
 # BLIP-VQA inference class
@@ -49,18 +18,113 @@ class BlipVQA:
         self.processor = model_state.blip_vqa_processor
         self.device = model_state.device
         self.model.eval()
+        # tensor-level BLIP preprocessing for PreparedImage inputs
+        self.tensor_preprocess = TensorPreprocess.from_hf(self.processor)
 
     # Inference method for multiple questions
     @torch.inference_mode()
     def ask_many(
-        self, image: Image.Image, questions: List[str], max_new_tokens: int = 16
+        self, image: ImageInput, questions: List[str], max_new_tokens: int = 16
+    ) -> Dict[str, str]:
+        if not questions:
+            return {}
+        if settings.VQA_BATCHED:
+            return self._ask_batched(image, questions, max_new_tokens)
+        return self._ask_sequential(image, questions, max_new_tokens)
+
+    def _ask_sequential(
+        self, image: ImageInput, questions: List[str], max_new_tokens: int
     ) -> Dict[str, str]:
         answers: Dict[str, str] = {}
         for q in questions:
-            inputs = self.processor(images=image, text=q, return_tensors="pt")
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            with stage("blip_question"):
+                inputs = self.processor(
+                    images=pil_of(image), text=q, return_tensors="pt"
+                )
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
 
-            out_ids = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
-            ans = self.processor.decode(out_ids[0], skip_special_tokens=True).strip()
-            answers[q] = ans
+                out_ids = self.model.generate(**inputs, max_new_tokens=max_new_tokens)
+                ans = self.processor.decode(out_ids[0], skip_special_tokens=True)
+            answers[q] = ans.strip()
         return answers
+
+    def _ask_batched(
+        self, image: ImageInput, questions: List[str], max_new_tokens: int
+    ) -> Dict[str, str]:
+        """
+        Same steps as BlipForQuestionAnswering.generate, but the image goes
+        through the processor and the vision tower once, and questions with
+        the same token length are encoded/decoded together.
+
+        Questions are never padded: BLIP's text decoder does not apply
+        encoder_attention_mask in its cross-attention (transformers 5.x), so
+        padded question tokens would change the answers. Grouping by length
+        keeps every batch exact (tools/check_vqa_parity.py checks it).
+        """
+        model = self.model
+
+        if isinstance(image, PreparedImage) and self.tensor_preprocess is not None:
+            pixel_values = image.input_for(self.tensor_preprocess).unsqueeze(0)
+        else:
+            pixel_values = self.processor(images=pil_of(image), return_tensors="pt")[
+                "pixel_values"
+            ]
+        pixel_values = pixel_values.to(self.device)
+
+        # 1) encode the image once, share it across every question
+        image_embeds = model.vision_model(pixel_values=pixel_values)[0]
+
+        # token length -> indices of the questions with that length
+        token_ids = [self.processor.tokenizer(q)["input_ids"] for q in questions]
+        groups: Dict[int, List[int]] = {}
+        for i, ids in enumerate(token_ids):
+            groups.setdefault(len(ids), []).append(i)
+
+        answers: Dict[str, str] = {}
+        for idx in groups.values():
+            decoded = self._answer_group(
+                image_embeds, [token_ids[i] for i in idx], max_new_tokens
+            )
+            for i, ans in zip(idx, decoded):
+                answers[questions[i]] = ans
+        return {q: answers[q] for q in questions}
+
+    def _answer_group(
+        self,
+        image_embeds: torch.Tensor,
+        token_rows: List[List[int]],
+        max_new_tokens: int,
+    ) -> List[str]:
+        # equal-length questions: a plain (n, L) batch, no padding to mask
+        model = self.model
+        n = len(token_rows)
+        input_ids = torch.tensor(token_rows, dtype=torch.long, device=self.device)
+
+        image_embeds = image_embeds.expand(n, -1, -1)
+        image_attention_mask = torch.ones(
+            image_embeds.shape[:-1], dtype=torch.long, device=image_embeds.device
+        )
+
+        # 2) encode the questions against the image
+        question_embeds = model.text_encoder(
+            input_ids=input_ids,
+            attention_mask=torch.ones_like(input_ids),
+            encoder_hidden_states=image_embeds,
+            encoder_attention_mask=image_attention_mask,
+            return_dict=False,
+        )[0]
+
+        # 3) decode their answers in one generate call
+        bos_ids = torch.full(
+            (n, 1), fill_value=model.decoder_start_token_id, device=self.device
+        )
+        out_ids = model.text_decoder.generate(
+            input_ids=bos_ids,
+            eos_token_id=model.config.text_config.sep_token_id,
+            pad_token_id=model.config.text_config.pad_token_id,
+            encoder_hidden_states=question_embeds,
+            max_new_tokens=max_new_tokens,
+        )
+
+        decoded = self.processor.batch_decode(out_ids, skip_special_tokens=True)
+        return [ans.strip() for ans in decoded]
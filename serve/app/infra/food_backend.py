@@ -0,0 +1,91 @@
+import abc
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+import torch
+
+from app.core.config import settings
+
+
+class FoodBackend(abc.ABC):
+    """
+    Runs the food classifier: logits (N, num_classes) for a preprocessed
+    (N, 3, H, W) float batch. `device` is where inputs should be placed.
+    """
+
+    name: str = ""
+    device: torch.device = torch.device("cpu")
+
+    @abc.abstractmethod
+    def __call__(self, x: torch.Tensor) -> torch.Tensor: ...
+
+
+class TorchFoodBackend(FoodBackend):
+    name = "torch"
+
+    def __init__(self, module: torch.nn.Module, device: Optional[str] = None):
+        self.module = module
+        # frozen TorchScript modules have no parameters to ask
+        self._device = torch.device(device) if device is not None else None
+
+    @property
+    def device(self) -> torch.device:
+        if self._device is not None:
+            return self._device
+        # read on every call: the module may be moved after wrapping
+        return next(self.module.parameters()).device
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        with torch.inference_mode():
+            return self.module(x)
+
+
+class OnnxFoodBackend(FoodBackend):
+    """
+    ONNX Runtime session over a model exported by tools/export_onnx.py
+    (input "input", output "logits", dynamic batch axis).
+    """
+
+    name = "onnx"
+
+    def __init__(self, path: Path, device: str = "cpu"):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "FOOD_BACKEND=onnx requires onnxruntime "
+                "(pip install -r requirements-onnx.txt)"
+            ) from e
+
+        if not path.exists():
+            raise FileNotFoundError(
+                f"Missing: {path} (run: python -m tools.export_onnx)"
+            )
+
+        opts = ort.SessionOptions()
+        # 0 = let ORT decide (one intra-op thread per physical core)
+        opts.intra_op_num_threads = settings.ORT_INTRA_OP_THREADS
+        opts.inter_op_num_threads = settings.ORT_INTER_OP_THREADS
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        providers: List[str] = ["CPUExecutionProvider"]
+        if (
+            device == "cuda"
+            and "CUDAExecutionProvider" in ort.get_available_providers()
+        ):
+            providers.insert(0, "CUDAExecutionProvider")
+
+        self.session = ort.InferenceSession(str(path), opts, providers=providers)
+        self.providers = self.session.get_providers()
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, x: torch.Tensor) -> torch.Tensor:
+        # inputs are built on CPU; ORT copies to the GPU itself when using CUDA
+        x = np.ascontiguousarray(x.detach().cpu().numpy(), dtype=np.float32)
+        (logits,) = self.session.run(None, {self.input_name: x})
+        return torch.from_numpy(logits)
+
+
+def onnx_path() -> Path:
+    return Path(settings.FOOD_ONNX_PATH or Path(settings.artifacts_dir) / "food.onnx")
@@ -1,38 +1,169 @@
-from typing import Any, Dict, List
+import json
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import LLM_COLD_LOADS, LLM_SECONDS, LLM_TOKENS
+
+
+@dataclass
+class OllamaUsage:
+    """
+    Token counts and durations Ollama reports on each completed call.
+    prompt_eval_* is prefill (low when the prompt prefix hit Ollama's cache),
+    eval_* is generation, load_* is time spent (re)loading the model.
+    Durations are in seconds.
+    """
+
+    calls: int = 0
+    prompt_eval_count: int = 0
+    prompt_eval_s: float = 0.0
+    eval_count: int = 0
+    eval_s: float = 0.0
+    load_s: float = 0.0
+    total_s: float = 0.0
+    cold_loads: int = 0
+
+    last: Optional[Dict[str, Any]] = None
+
+    def record(self, data: Dict[str, Any]) -> None:
+        # Ollama durations are nanoseconds
+        last = {
+            "prompt_eval_count": int(data.get("prompt_eval_count") or 0),
+            "prompt_eval_s": (data.get("prompt_eval_duration") or 0) / 1e9,
+            "eval_count": int(data.get("eval_count") or 0),
+            "eval_s": (data.get("eval_duration") or 0) / 1e9,
+            "load_s": (data.get("load_duration") or 0) / 1e9,
+            "total_s": (data.get("total_duration") or 0) / 1e9,
+        }
+        self.calls += 1
+        self.prompt_eval_count += last["prompt_eval_count"]
+        self.prompt_eval_s += last["prompt_eval_s"]
+        self.eval_count += last["eval_count"]
+        self.eval_s += last["eval_s"]
+        self.load_s += last["load_s"]
+        self.total_s += last["total_s"]
+        # a load of more than ~0.5s means the model was not resident
+        if last["load_s"] > 0.5:
+            self.cold_loads += 1
+            LLM_COLD_LOADS.inc()
+        self.last = last
+
+        for phase in ("prompt_eval", "eval"):
+            LLM_TOKENS.observe(last[f"{phase}_count"], phase=phase)
+        for phase in ("prompt_eval", "eval", "load", "total"):
+            LLM_SECONDS.observe(last[f"{phase}_s"], phase=phase)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return asdict(self)
 
 
 class OllamaClient:
-    def __init__(self):
+    def __init__(self, client: Optional[httpx.AsyncClient] = None):
         self.base_url = settings.OLLAMA_BASE_URL.rstrip(
             "/"
         )  # for example, http://127.0.0.1:11434
         self.model = settings.OLLAMA_MODEL
         self.timeout = httpx.Timeout(settings.OLLAMA_TIMEOUT_S)
+        # "30m" style durations go as strings, bare numbers (seconds, -1 = forever)
+        # must be sent as JSON numbers
+        ka = settings.OLLAMA_KEEP_ALIVE.strip()
+        self.keep_alive: Any = int(ka) if ka.lstrip("-").isdigit() else ka
+        # shared keep-alive client from lifespan; None -> one client per call
+        self.client = client
+        self.usage = OllamaUsage()
+
+    def _payload(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        stream: bool,
+        num_predict: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        # Keep options identical across calls: load-time options that change
+        # between requests make Ollama reload the model.
+        options: Dict[str, Any] = {"temperature": temperature}
+        if num_predict is not None:
+            options["num_predict"] = num_predict
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": options,
+        }
+
+    async def _post(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self.client is not None:
+            r = await self.client.post(url, json=payload)
+        else:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                r = await client.post(url, json=payload)
+        r.raise_for_status()
+        return r.json()
 
     async def chat(
-        self, messages: List[Dict[str, str]], temperature: float = 0.2
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.2,
+        num_predict: Optional[int] = None,
     ) -> str:
         """
         Ollama /api/chat:
-        payload: {"model": "...", "messages": [...], "stream": false, "options": {...}}
+        payload: {"model": "...", "messages": [...], "stream": false, "keep_alive": "...", "options": {...}}
         return: {"message": {"role":"assistant","content":"..."} , ...}
         """
         url = f"{self.base_url}/api/chat"
-        payload: Dict[str, Any] = {
-            "model": self.model,
-            "messages": messages,
-            "stream": False,
-            "options": {"temperature": temperature},
-        }
-
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            r = await client.post(url, json=payload)
-            r.raise_for_status()
-            data = r.json()
+        payload = self._payload(messages, temperature, False, num_predict)
+        data = await self._post(url, payload)
+        self.usage.record(data)
 
         # Ollama return: {"message": {"role":"assistant","content":"..."}, ...}
         return (data.get("message") or {}).get("content", "").strip()
+
+    async def chat_stream(
+        self, messages: List[Dict[str, str]], temperature: float = 0.2
+    ) -> AsyncIterator[str]:
+        """
+        Ollama /api/chat with "stream": true.
+        Ollama replies with NDJSON lines: {"message": {"content": "<delta>"}, "done": false}
+        ... and a final line with "done": true. Yields the content deltas.
+        """
+        url = f"{self.base_url}/api/chat"
+        payload = self._payload(messages, temperature, True)
+
+        if self.client is not None:
+            async for delta in self._stream(self.client, url, payload):
+                yield delta
+        else:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                async for delta in self._stream(client, url, payload):
+                    yield delta
+
+    async def _stream(
+        self, client: httpx.AsyncClient, url: str, payload: Dict[str, Any]
+    ) -> AsyncIterator[str]:
+        async with client.stream("POST", url, json=payload) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise RuntimeError(f"Ollama error: {data['error']}")
+                delta = (data.get("message") or {}).get("content", "")
+                if delta:
+                    yield delta
+                if data.get("done"):
+                    self.usage.record(data)
+                    break
+
+    async def load_model(self) -> None:
+        """
+        Load the model (or refresh its keep_alive) without generating anything:
+        Ollama /api/generate with no prompt.
+        """
+        url = f"{self.base_url}/api/generate"
+        await self._post(url, {"model": self.model, "keep_alive": self.keep_alive})
@@ -1,3 +1,4 @@
+import hashlib
 import json
 from pathlib import Path
 from typing import List, Dict, Tuple, Any
@@ -8,6 +9,7 @@ from PIL import Image
 from torchvision import transforms
 
 from app.core.config import settings
+from app.infra.food_backend import FoodBackend
 
 # Link: DACN2_AIserver/artifacts
 ARTIFACTS_DIR = Path(settings.artifacts_dir).resolve()
@@ -59,6 +61,57 @@ def build_preprocess(cfg: dict) -> Any:
     return tf
 
 
+def weights_file() -> Path:
+    """
+    best.safetensors (see tools/convert_safetensors.py) if present, else best.pt.
+    """
+    st_path = ARTIFACTS_DIR / "best.safetensors"
+    if st_path.exists():
+        return st_path
+    weights_path = ARTIFACTS_DIR / "best.pt"
+    if not weights_path.exists():
+        raise FileNotFoundError(f"Missing: {weights_path}")
+    return weights_path
+
+
+def artifact_version(model_path: Path) -> str:
+    """
+    Short fingerprint of the food model files (name, size, mtime of the
+    weights / ONNX export, config and classes): changes whenever the model
+    is retrained or re-exported.
+    """
+    h = hashlib.sha1()
+    for path in (
+        model_path,
+        ARTIFACTS_DIR / "model_config.json",
+        ARTIFACTS_DIR / "food101_classes.json",
+    ):
+        st = path.stat()
+        h.update(f"{path.name}:{st.st_size}:{st.st_mtime_ns};".encode())
+    return h.hexdigest()[:12]
+
+
+def load_weights() -> Dict[str, torch.Tensor]:
+    """
+    Food model state dict, memory-mapped: tensors are backed by the file's
+    pages instead of being read into the heap. best.safetensors (see
+    tools/convert_safetensors.py) is preferred over best.pt.
+    """
+    weights_path = weights_file()
+    if weights_path.suffix == ".safetensors":
+        from safetensors.torch import load_file
+
+        return load_file(str(weights_path))
+
+    try:
+        return torch.load(
+            weights_path, map_location="cpu", mmap=True, weights_only=True
+        )
+    except RuntimeError:
+        # legacy (non-zipfile) checkpoints can't be mmap'd
+        return torch.load(weights_path, map_location="cpu")
+
+
 def build_model(cfg: dict) -> torch.nn.Module:
     """
     Build timm model and load weights.
@@ -68,27 +121,31 @@ def build_model(cfg: dict) -> torch.nn.Module:
             "model_config.json must include keys: 'arch' and 'num_classes'"
         )
 
-    device = torch.device("cpu")
-    model = timm.create_model(
-        cfg["arch"], pretrained=False, num_classes=cfg["num_classes"]
-    )
-
-    weights_path = ARTIFACTS_DIR / "best.pt"
-    if not weights_path.exists():
-        raise FileNotFoundError(f"Missing: {weights_path}")
+    # skeleton on the meta device (no random init, no allocation); the
+    # mmap'd weights are then assigned as-is rather than copied in
+    with torch.device("meta"):
+        model = timm.create_model(
+            cfg["arch"], pretrained=False, num_classes=cfg["num_classes"]
+        )
 
-    state = torch.load(weights_path, map_location=device)
+    state = load_weights()
 
     # if isinstance(state, dict) and "state_dict" in state:
     #     state = state["state_dict"]
 
-    model.load_state_dict(state)
+    model.load_state_dict(state, assign=True)
+    if any(t.is_meta for t in [*model.parameters(), *model.buffers()]):
+        # non-persistent buffers aren't in the state dict: build normally
+        model = timm.create_model(
+            cfg["arch"], pretrained=False, num_classes=cfg["num_classes"]
+        )
+        model.load_state_dict(state)
     model.eval()
     return model
 
 
 def predict_with(
-    model: torch.nn.Module,
+    model: FoodBackend,
     preprocess: Any,
     classes: list[str],
     image: Image.Image,
@@ -97,26 +154,59 @@ def predict_with(
     """
     Predict top_k from a PIL image using provided model+preprocess+classes.
     """
+    return predict_batch_with(model, preprocess, classes, [image], top_k=top_k)[0]
+
+
+def predict_batch_with(
+    model: FoodBackend,
+    preprocess: Any,
+    classes: list[str],
+    images: List[Image.Image],
+    top_k: int = 3,
+) -> List[List[Dict]]:
+    """
+    Predict top_k for several PIL images with one stacked forward pass.
+    Returns one prediction list per input image, in order.
+    """
     if model is None or preprocess is None or classes is None:
         raise RuntimeError("Model/preprocess/classes not initialized")
+    if not images:
+        return []
 
     top_k = max(1, min(int(top_k), len(classes)))
 
-    x = preprocess(image.convert("RGB")).unsqueeze(0)
+    x = torch.stack(
+        [
+            preprocess(image if image.mode == "RGB" else image.convert("RGB"))
+            for image in images
+        ]
+    )
+    return predict_tensors(model, classes, x, top_k=top_k)
+
+
+def predict_tensors(
+    model: FoodBackend,
+    classes: list[str],
+    x: torch.Tensor,
+    top_k: int = 3,
+) -> List[List[Dict]]:
+    """
+    Predict top_k for an already preprocessed (N, 3, H, W) batch.
+    """
+    top_k = max(1, min(int(top_k), len(classes)))
 
     # move input to model device
-    device = next(model.parameters()).device
-    x = x.to(device)
+    x = x.to(model.device)
 
+    out = model(x)
     with torch.inference_mode():
-        out = model(x)
-        prob = torch.softmax(out, dim=1)[0]
+        prob = torch.softmax(out, dim=1)
 
     # move prob to cpu and detach
     prob = prob.detach().cpu()
-    scores, idxs = torch.topk(prob, k=top_k)
+    scores, idxs = torch.topk(prob, k=top_k, dim=1)
 
     return [
-        {"label": classes[i], "score": float(s)}
-        for i, s in zip(idxs.tolist(), scores.tolist())
+        [{"label": classes[i], "score": float(s)} for i, s in zip(row_i, row_s)]
+        for row_i, row_s in zip(idxs.tolist(), scores.tolist())
     ]
@@ -0,0 +1,160 @@
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple, Union
+
+import torch
+from PIL import Image
+from torchvision import transforms
+from torchvision.transforms import InterpolationMode
+from torchvision.transforms import functional as F
+
+from app.core.config import settings
+
+# PIL resample codes used by HF image processors -> tensor interpolation
+_PIL_TO_INTERP = {
+    0: InterpolationMode.NEAREST,
+    2: InterpolationMode.BILINEAR,
+    3: InterpolationMode.BICUBIC,
+}
+
+
+@dataclass(frozen=True)
+class TensorPreprocess:
+    """
+    Tensor-level equivalent of one model's image preprocessing:
+    resize (shorter side or fixed HxW) -> center crop -> /255 -> normalize.
+    """
+
+    mean: Tuple[float, ...]
+    std: Tuple[float, ...]
+    resize_shortest: Optional[int] = None
+    resize_hw: Optional[Tuple[int, int]] = None
+    crop_hw: Optional[Tuple[int, int]] = None
+    interpolation: InterpolationMode = InterpolationMode.BILINEAR
+    rescale: float = 1.0 / 255.0
+    # HF processors floor the crop offset, torchvision's CenterCrop rounds it
+    floor_crop_offset: bool = False
+
+    def __call__(self, pixels: torch.Tensor) -> torch.Tensor:
+        """
+        pixels: uint8 (3, H, W) -> float32 (3, h, w) model input.
+        """
+        x = pixels
+        if self.resize_hw is not None:
+            x = F.resize(x, list(self.resize_hw), self.interpolation, antialias=True)
+        elif self.resize_shortest is not None:
+            x = F.resize(x, self.resize_shortest, self.interpolation, antialias=True)
+        if self.crop_hw is not None:
+            x = self._center_crop(x)
+        x = x.to(torch.float32) * self.rescale
+        return F.normalize(x, list(self.mean), list(self.std))
+
+    def _center_crop(self, x: torch.Tensor) -> torch.Tensor:
+        ch, cw = self.crop_hw
+        h, w = x.shape[-2:]
+        if not self.floor_crop_offset or ch > h or cw > w:
+            return F.center_crop(x, [ch, cw])
+        return F.crop(x, (h - ch) // 2, (w - cw) // 2, ch, cw)
+
+    @classmethod
+    def from_torchvision(cls, tf: Any) -> Optional["TensorPreprocess"]:
+        """
+        From the food model's Resize -> CenterCrop -> ToTensor -> Normalize.
+        Returns None for pipelines it cannot reproduce exactly.
+        """
+        kwargs: Dict[str, Any] = {}
+        for t in getattr(tf, "transforms", []):
+            if isinstance(t, transforms.Resize):
+                if isinstance(t.size, int) or len(t.size) == 1:
+                    size = t.size if isinstance(t.size, int) else t.size[0]
+                    kwargs["resize_shortest"] = int(size)
+                else:
+                    kwargs["resize_hw"] = (int(t.size[0]), int(t.size[1]))
+                kwargs["interpolation"] = t.interpolation
+            elif isinstance(t, transforms.CenterCrop):
+                kwargs["crop_hw"] = (int(t.size[0]), int(t.size[1]))
+            elif isinstance(t, transforms.Normalize):
+                kwargs["mean"] = tuple(float(v) for v in t.mean)
+                kwargs["std"] = tuple(float(v) for v in t.std)
+            elif not isinstance(t, transforms.ToTensor):
+                return None
+        if "mean" not in kwargs:
+            return None
+        return cls(**kwargs)
+
+    @classmethod
+    def from_hf(cls, processor: Any) -> Optional["TensorPreprocess"]:
+        """
+        From a HF image processor (CLIP / BLIP). Returns None if it uses a
+        resample filter or step that has no tensor equivalent here.
+        """
+        ip = getattr(processor, "image_processor", processor)
+
+        def _get(size: Any, key: str) -> Optional[int]:
+            if size is None:
+                return None
+            value = (
+                size.get(key) if isinstance(size, dict) else getattr(size, key, None)
+            )
+            return int(value) if value is not None else None
+
+        interpolation = _PIL_TO_INTERP.get(int(getattr(ip, "resample", 3)))
+        if interpolation is None or not getattr(ip, "do_normalize", True):
+            return None
+
+        kwargs: Dict[str, Any] = {
+            "mean": tuple(float(v) for v in ip.image_mean),
+            "std": tuple(float(v) for v in ip.image_std),
+            "interpolation": interpolation,
+            "rescale": float(ip.rescale_factor) if ip.do_rescale else 1.0,
+            "floor_crop_offset": True,
+        }
+
+        if getattr(ip, "do_resize", True):
+            size = ip.size
+            if _get(size, "shortest_edge") is not None:
+                kwargs["resize_shortest"] = _get(size, "shortest_edge")
+            elif _get(size, "height") is not None and _get(size, "width") is not None:
+                kwargs["resize_hw"] = (_get(size, "height"), _get(size, "width"))
+            else:
+                return None
+
+        if getattr(ip, "do_center_crop", False):
+            crop = ip.crop_size
+            kwargs["crop_hw"] = (_get(crop, "height"), _get(crop, "width"))
+
+        return cls(**kwargs)
+
+
+class PreparedImage:
+    """
+    A decoded image converted to a uint8 tensor exactly once.
+
+    Each model's input is derived from that tensor on first use and memoized,
+    so CLIP, the food model and BLIP share one PIL -> tensor conversion.
+    """
+
+    def __init__(self, image: Image.Image) -> None:
+        self.image = image if image.mode == "RGB" else image.convert("RGB")
+        self.pixels = F.pil_to_tensor(self.image)  # uint8 (3, H, W)
+        self._inputs: Dict[TensorPreprocess, torch.Tensor] = {}
+
+    def input_for(self, spec: TensorPreprocess) -> torch.Tensor:
+        x = self._inputs.get(spec)
+        if x is None:
+            x = spec(self.pixels)
+            self._inputs[spec] = x
+        return x
+
+
+ImageInput = Union[Image.Image, PreparedImage]
+
+
+def pil_of(image: ImageInput) -> Image.Image:
+    return image.image if isinstance(image, PreparedImage) else image
+
+
+def prepare_image(image: Image.Image) -> ImageInput:
+    """
+    Wrap a decoded image for shared preprocessing (SHARED_PREPROCESS=1).
+    """
+    return PreparedImage(image) if settings.SHARED_PREPROCESS else image
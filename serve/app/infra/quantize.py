@@ -0,0 +1,65 @@
+import warnings
+from typing import TYPE_CHECKING, Dict, Iterable, Optional
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    from torch import nn
+
+# CLIP submodules used to embed images; the text tower only runs once at
+# startup (prompt cache) and stays fp32
+CLIP_IMAGE_MODULES = ("vision_model", "visual_projection")
+
+# models QUANTIZE applies to. The food model (EfficientNet) is nearly all
+# conv layers, and dynamic quantization only covers nn.Linear: on it int8
+# would touch just the classifier head, with no size or latency gain.
+QUANTIZED_MODELS = ("clip", "blip")
+
+
+def quantization_mode(device: str) -> Optional[str]:
+    """
+    Effective QUANTIZE mode for `device`: int8 kernels are CPU-only, so GPU /
+    MPS deployments keep fp32 whatever the setting says.
+    """
+    if settings.QUANTIZE == "int8" and device == "cpu":
+        return "int8"
+    return None
+
+
+def quantization_by_model(device: str) -> Dict[str, str]:
+    """
+    Effective quantization per model, as reported on /health.
+    """
+    mode = quantization_mode(device) or "none"
+    return {
+        name: mode if name in QUANTIZED_MODELS else "none"
+        for name in ("food", "clip", "blip")
+    }
+
+
+def quantize_int8(
+    model: "nn.Module", submodules: Optional[Iterable[str]] = None
+) -> "nn.Module":
+    """
+    Dynamic int8 quantization, in place: nn.Linear weights are stored as int8
+    and activations are quantized per batch at run time, so no calibration
+    data is needed. Conv layers are left in fp32.
+
+    `submodules` limits it to those child module names (default: all).
+    """
+    import torch
+    from torch import nn
+    from torch.ao.nn.quantized.dynamic import Linear as DynamicLinear
+    from torch.ao.quantization import quantize_dynamic
+
+    spec = set(submodules) if submodules is not None else {nn.Linear}
+    # Linear only: the default mapping would also pick up embeddings inside
+    # named submodules, which need a different qconfig
+    mapping = {nn.Linear: DynamicLinear}
+    with warnings.catch_warnings():
+        # torch.ao.quantization is deprecated in favour of torchao, but still
+        # the only int8 path that needs no extra dependency
+        warnings.simplefilter("ignore", DeprecationWarning)
+        warnings.simplefilter("ignore", UserWarning)
+        quantize_dynamic(model, spec, dtype=torch.qint8, mapping=mapping, inplace=True)
+    return model
@@ -0,0 +1,74 @@
+import time
+import warnings
+from typing import Any, Dict, List
+
+import torch
+from PIL import Image
+
+from app.core.config import settings
+from app.infra.preprocess import prepare_image
+
+
+def compile_module(module: torch.nn.Module, example: torch.Tensor) -> Any:
+    """
+    Apply MODEL_COMPILE to an eval-mode module:
+    - trace:   TorchScript trace on `example`, then freeze (folds BN into
+               convs, inlines weights). Batch size stays dynamic.
+    - compile: torch.compile; graphs are built on first call, which is
+               what the warm-up is for.
+    - none:    the module as is.
+    """
+    mode = settings.MODEL_COMPILE
+    if mode == "none":
+        return module
+    if mode == "compile":
+        return torch.compile(module)
+    if mode != "trace":
+        raise ValueError(f"Unknown MODEL_COMPILE: {mode}")
+
+    with torch.no_grad(), warnings.catch_warnings():
+        # jit.trace is deprecated upstream but still the cheapest static
+        # graph on CPU; HF models also emit TracerWarnings for shape asserts
+        warnings.simplefilter("ignore")
+        traced = torch.jit.trace(module.eval(), example, check_trace=False)
+        return torch.jit.freeze(traced)
+
+
+def warmup_batch_sizes(max_size: int) -> List[int]:
+    """
+    Batch sizes a micro-batcher with `max_size` will run: 1..max_size, or
+    WARMUP_BATCH_SIZES (sizes above max_size never occur and are dropped).
+    """
+    max_size = max(1, max_size)
+    if settings.WARMUP_BATCH_SIZES:
+        sizes = {int(v) for v in settings.WARMUP_BATCH_SIZES.split(",") if v}
+        return sorted(n for n in sizes if 1 <= n <= max_size) or [1]
+    return list(range(1, max_size + 1))
+
+
+def warm_up(food_pipeline: Any, vision_router: Any, side: int) -> Dict[str, Any]:
+    """
+    Run a dummy image through CLIP routing and the food model at every batch
+    size they will see, so the first real requests don't pay for lazy kernel
+    selection, allocator growth or graph compilation.
+    """
+    side = side or 256
+    image = prepare_image(Image.new("RGB", (side * 4 // 3, side), (127, 127, 127)))
+    clip_sizes = warmup_batch_sizes(settings.CLIP_BATCH_MAX_SIZE)
+    food_sizes = warmup_batch_sizes(settings.FOOD_BATCH_MAX_SIZE)
+
+    t0 = time.perf_counter()
+    vision_router.warm_up(image, clip_sizes)
+    clip_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    food_pipeline.warm_up(image, food_sizes)
+    food_s = time.perf_counter() - t0
+
+    return {
+        "compile": settings.MODEL_COMPILE,
+        "clip_batch_sizes": clip_sizes,
+        "food_batch_sizes": food_sizes,
+        "clip_s": round(clip_s, 3),
+        "food_s": round(food_s, 3),
+    }
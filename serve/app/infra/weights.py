@@ -0,0 +1,26 @@
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+def from_pretrained_mmap(cls: Any, name: str, **kwargs: Any) -> Any:
+    """
+    `cls.from_pretrained` with zero-copy loading: the model is created on the
+    meta device and the safetensors weights are memory-mapped and assigned
+    (low_cpu_mem_usage), so loading never holds a second copy of the
+    weights. Checkpoints that only ship pytorch_model.bin fall back to the
+    regular loader; convert them once with tools/convert_safetensors.py.
+    """
+    try:
+        return cls.from_pretrained(
+            name, low_cpu_mem_usage=True, use_safetensors=True, **kwargs
+        )
+    except OSError:
+        logger.warning(
+            "%s has no safetensors weights; loading without mmap "
+            "(convert with: python -m tools.convert_safetensors --hf %s ...)",
+            name,
+            name,
+        )
+        return cls.from_pretrained(name, low_cpu_mem_usage=True, **kwargs)
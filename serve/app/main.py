@@ -1,87 +1,121 @@
+import asyncio
+import logging
 from contextlib import asynccontextmanager
 
-import torch
 from fastapi import FastAPI
 from fastapi.exceptions import RequestValidationError
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.exceptions import HTTPException as StarletteHTTPException
-from transformers import CLIPModel, CLIPProcessor
 
 from app.api.v1.routes.inference import router as inference_router
 from app.core.config import settings
+from app.core.executor import inference_executor
+from app.core.fetch_image import fetch_cache
+from app.core.http_clients import build_http_clients
+from app.core.metrics import (
+    BATCH_WAITING,
+    CONTENT_TYPE,
+    LANE_RUNNING,
+    MODEL_LOAD_SECONDS,
+    QUEUE_DEPTH,
+    REGISTRY,
+    MetricsMiddleware,
+    cache_hit_ratio,
+)
+from app.core.timing import TimingMiddleware
 from app.core.state import model_state
-from app.domain.food_pipeline import FoodPipeline
-from app.domain.health_pipeline import HealthPipeline
 from app.domain.llm_engine import LLMEngine
-from app.domain.vision_router_service import VisionRouterService
-from app.infra.predict_food import load_artifacts, build_model, build_preprocess
+from app.domain.speculative_food import speculative_food
+from app.domain.vision_cache import vision_cache
+from app.infra.blip_loader import blip_loader
+from app.infra.quantize import quantization_by_model
 
+# No torch / transformers / timm / torchvision at module level, here or in
+# anything imported above: they take seconds to import and the port is not
+# bound until this module is. Model code is imported by load_models() below
+# (app.startup); tools/check_import_time.py enforces this.
 
-def pick_device() -> str:
-    """
-    Device policy:
-    - DEVICE=cuda: use CUDA if available, else fallback cpu
-    - DEVICE=mps:  use MPS if available, else fallback cpu
-    - DEVICE=cpu:  force cpu
-    - DEVICE=auto: prefer cuda -> mps -> cpu
-    """
-    dev = settings.DEVICE
-
-    # Helper: safe check MPS (torch.backends.mps may not exist on non-mac builds)
-    has_mps = hasattr(torch.backends, "mps") and torch.backends.mps.is_available()
+logger = logging.getLogger(__name__)
 
-    if dev == "cpu":
-        return "cpu"
 
-    if dev == "cuda":
-        return "cuda" if torch.cuda.is_available() else "cpu"
+def _load_models_blocking(state) -> None:
+    # the imports alone take seconds: keep them off the event loop too
+    from app.startup import load_models as load
 
-    if dev == "mps":
-        return "mps" if has_mps else "cpu"
+    load(state)
 
-    # auto
-    if torch.cuda.is_available():
-        return "cuda"
-    if has_mps:
-        return "mps"
-    return "cpu"
 
-
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    device = pick_device()
+async def load_models(app: FastAPI) -> None:
+    model_state.loading = True
     try:
-        # 1) load food model
-        cfg, classes = load_artifacts()
-        model = build_model(cfg)
-        model.to(device)
-        preprocess = build_preprocess(cfg)
-        model_state.model = model
-        model_state.preprocess = preprocess
-        model_state.classes = classes
-        model_state.device = device
-
-        # 2) load CLIP router
-        model_state.clip_processor = CLIPProcessor.from_pretrained(
-            settings.CLIP_MODEL_NAME
-        )
-        model_state.clip_model = CLIPModel.from_pretrained(settings.CLIP_MODEL_NAME)
-        model_state.clip_model.eval()
-        model_state.clip_model.to(device)
-
-        # 3) initialize domain services after model load
-        app.state.food_pipeline = FoodPipeline()
-        app.state.health_pipeline = HealthPipeline()
-        app.state.vision_router = VisionRouterService()
-        app.state.llm_engine = LLMEngine()
+        # in a worker thread: the event loop keeps answering /health
+        await asyncio.to_thread(_load_models_blocking, app.state)
 
         model_state.error = None
+
+        # 5) BLIP-VQA: loaded in a worker thread either way
+        if settings.BLIP_LOAD_POLICY == "eager":
+            await blip_loader.wait()
+            if blip_loader.state == "failed":
+                # part of readiness with this policy: /ready reports it
+                model_state.error = f"BLIP-VQA failed to load: {blip_loader.error}"
+        elif settings.BLIP_LOAD_POLICY == "background":
+            blip_loader.start()
     except Exception as e:
+        logger.exception("model load failed")
         model_state.error = str(e)
+    finally:
+        model_state.loading = False
+
+
+def models_ready() -> bool:
+    """
+    Food model and CLIP loaded and warmed up (plus BLIP-VQA with
+    BLIP_LOAD_POLICY=eager): what /ready reports.
+    """
+    if not model_state.warm or model_state.loading:
+        return False
+    if settings.BLIP_LOAD_POLICY == "eager":
+        return blip_loader.state == "loaded"
+    return True
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    inference_executor.start()
+    app.state.http_clients = build_http_clients()
+    # text-only chat does not need the vision models
+    app.state.llm_engine = LLMEngine(http_client=app.state.http_clients.ollama)
+    app.state.llm_engine.start()
+
+    app.state.model_load = asyncio.create_task(load_models(app))
+    if not settings.MODEL_LOAD_BACKGROUND:
+        await app.state.model_load
     yield
 
+    if not app.state.model_load.done():
+        # the worker thread finishes on its own; don't wait for it
+        app.state.model_load.cancel()
+    await app.state.llm_engine.aclose()
+    await app.state.http_clients.aclose()
+    inference_executor.shutdown()
+
 
 app = FastAPI(title="AI Inference Server", lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+if settings.SERVER_TIMING:
+    app.add_middleware(
+        TimingMiddleware,
+        paths=[
+            f"{inference_router.prefix}/chat",
+            f"{inference_router.prefix}/chat:stream",
+            f"{inference_router.prefix}/food-image",
+            f"{inference_router.prefix}/chat:upload",
+            f"{inference_router.prefix}/food-image:upload",
+            f"{inference_router.prefix}/food-image:batch",
+            f"{inference_router.prefix}/food-image:batch-upload",
+        ],
+    )
 
 
 @app.exception_handler(StarletteHTTPException)
@@ -94,7 +128,11 @@ async def http_exception_handler(request, exc: StarletteHTTPException):
             content = {"status": "error", "error": content}
     else:
         content = {"status": "error", "error": str(exc.detail)}
-    return JSONResponse(status_code=exc.status_code, content=content)
+    return JSONResponse(
+        status_code=exc.status_code,
+        content=content,
+        headers=getattr(exc, "headers", None),
+    )
 
 
 @app.exception_handler(RequestValidationError)
@@ -113,19 +151,94 @@ async def validation_exception_handler(request, exc: RequestValidationError):
 def health():
     return {
         "status": "ok",
-        "food_ready": model_state.model is not None
+        "ready": models_ready(),
+        "loading": model_state.loading,
+        "food_ready": model_state.warm
+        and model_state.model is not None
         and model_state.preprocess is not None
         and model_state.classes is not None,
-        "clip_ready": model_state.clip_model is not None
+        "clip_ready": model_state.warm
+        and model_state.clip_model is not None
         and model_state.clip_processor is not None,
         "blip_ready": model_state.blip_vqa_model is not None
         and model_state.blip_vqa_processor is not None,
+        "blip_loading": blip_loader.stats(),
         "llm_ready": hasattr(app.state, "llm_engine")
         and app.state.llm_engine is not None,
+        "llm": (
+            app.state.llm_engine.stats()
+            if getattr(app.state, "llm_engine", None) is not None
+            else None
+        ),
         "num_classes": len(model_state.classes) if model_state.classes else 0,
         "device": model_state.device,
+        "food_backend": getattr(model_state.model, "name", None),
+        "model_load_s": {
+            labels[0]: round(seconds, 3)
+            for labels, seconds in MODEL_LOAD_SECONDS.values().items()
+        },
+        "quantization": quantization_by_model(model_state.device),
+        "vision_cache": vision_cache.stats(),
+        "fetch_cache": fetch_cache.stats() if fetch_cache is not None else None,
+        "inference": inference_executor.stats(),
+        "food_batching": (
+            app.state.food_pipeline.batcher.stats()
+            if hasattr(app.state, "food_pipeline")
+            else None
+        ),
+        "clip_batching": (
+            app.state.vision_router.batcher.stats()
+            if hasattr(app.state, "vision_router")
+            else None
+        ),
+        "speculative_food": speculative_food.stats(),
+        "warmup": getattr(app.state, "warmup", None),
         "error": model_state.error,
     }
 
 
+@app.get("/ready")
+def ready():
+    # readiness probe; /health (always 200) is the liveness probe
+    if models_ready():
+        return {"status": "ok"}
+    return JSONResponse(
+        status_code=503,
+        content={
+            "status": "loading" if model_state.error is None else "error",
+            "error": model_state.error,
+        },
+    )
+
+
+def _collect_runtime_metrics() -> None:
+    # gauges mirroring state kept by the executor, batchers and caches
+    stats = inference_executor.stats()
+    QUEUE_DEPTH.set(stats["pending"])
+    for lane, running in stats["running"].items():
+        LANE_RUNNING.set(running, lane=lane)
+
+    food_pipeline = getattr(app.state, "food_pipeline", None)
+    if food_pipeline is not None:
+        BATCH_WAITING.set(food_pipeline.batcher.stats()["waiting"], lane="food")
+    vision_router = getattr(app.state, "vision_router", None)
+    if vision_router is not None:
+        BATCH_WAITING.set(vision_router.batcher.stats()["waiting"], lane="clip")
+
+    for kind, misses in vision_cache.misses.items():
+        hits = vision_cache.hits.get(kind, 0)
+        cache_hit_ratio(f"vision_{kind}", hits, hits + misses)
+    if fetch_cache is not None:
+        served = fetch_cache.hits + fetch_cache.revalidated
+        cache_hit_ratio("fetch", served, served + fetch_cache.misses)
+
+
+REGISTRY.add_collector(_collect_runtime_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
 app.include_router(inference_router)
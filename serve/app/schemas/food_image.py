@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -10,6 +10,7 @@ class FoodPrediction(BaseModel):
 
 class FoodImageRequest(BaseModel):
     image_url: str
+    session_id: Optional[str] = None  # only used to key timing logs
 
 
 class FoodImageResponse(BaseModel):
@@ -17,3 +18,25 @@ class FoodImageResponse(BaseModel):
     is_food: bool
     message: str
     predictions: List[FoodPrediction] = Field(default_factory=list)
+
+
+class FoodImageBatchRequest(BaseModel):
+    image_urls: List[str] = Field(min_length=1)
+    session_id: Optional[str] = None  # only used to key timing logs
+
+
+class FoodImageBatchItem(BaseModel):
+    """
+    One line of the /food-image:batch stream: the /food-image response for
+    image_urls[index] (or the index-th uploaded file), or status "error"
+    with the reason for that image.
+    """
+
+    index: int
+    image_url: Optional[str] = None
+    filename: Optional[str] = None
+    status: str
+    is_food: Optional[bool] = None
+    message: Optional[str] = None
+    predictions: List[FoodPrediction] = Field(default_factory=list)
+    error: Optional[str] = None
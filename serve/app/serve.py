@@ -0,0 +1,202 @@
+"""
+Prefork server: `python -m app.serve [--host H] [--port P]`.
+
+The master process loads the models once, then forks WORKERS uvicorn
+workers that all accept on one shared listening socket. Tensor storage is
+allocated outside the Python heap and never written after load, so the
+workers share the master's weights copy-on-write instead of each loading
+their own; gc.freeze() keeps the collector from touching (and so copying)
+the pages holding the objects that wrap them.
+
+Per worker, torch uses TORCH_THREADS intra-op threads (default: cores /
+WORKERS) so workers don't oversubscribe the CPU. Everything with threads or
+sockets (inference executor, HTTP clients, batchers, ONNX Runtime
+sessions, warm-up) is created after the fork by each worker's lifespan.
+With WORKERS=1 it is a plain uvicorn server (no preload, no fork).
+
+WORKERS>1 requires the device to resolve to CPU: CUDA and MPS cannot be
+used in a child forked after the parent touched them. The listening
+socket is bound before the preload, but nothing accepts on it until the
+workers start, so /health only answers quickly with WORKERS=1.
+"""
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+from typing import Dict
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.state import model_state
+from app.infra.blip_loader import blip_loader
+from app.main import app
+
+logger = logging.getLogger("app.serve")
+
+
+def worker_threads(workers: int) -> int:
+    if settings.TORCH_THREADS > 0:
+        return settings.TORCH_THREADS
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def preload(device: str) -> None:
+    """
+    Load what the workers will share. Runs single-threaded: an OpenMP pool
+    started before fork() is not usable in the children.
+    """
+    import torch
+
+    from app.infra.predict_food import load_artifacts
+    from app.startup import load_clip, load_food_model
+
+    torch.set_num_threads(1)
+    model_state.device = device
+
+    cfg, classes = load_artifacts()
+    # ONNX Runtime sessions own thread pools, which don't survive a fork
+    if settings.FOOD_BACKEND != "onnx":
+        load_food_model(cfg, classes, device)
+    load_clip(device)
+    if settings.BLIP_LOAD_POLICY in {"eager", "background"}:
+        blip_loader.load_blocking()
+        if blip_loader.state == "failed":
+            logger.warning("BLIP-VQA preload failed: %s", blip_loader.error)
+
+
+def bind(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(sock: socket.socket, threads: int) -> None:
+    # applied when the worker's lifespan loads the models, so that torch is
+    # not imported before the port is bound
+    settings.TORCH_THREADS = threads
+    if settings.ORT_INTRA_OP_THREADS == 0:
+        settings.ORT_INTRA_OP_THREADS = threads
+
+    config = uvicorn.Config(app, lifespan="on", log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn(sock: socket.socket, threads: int) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        code = 0
+        try:
+            serve(sock, threads)
+        except BaseException:
+            logger.exception("worker %d crashed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Prefork inference server")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+
+    workers = max(1, settings.WORKERS)
+    threads = worker_threads(workers)
+    if workers == 1:
+        # nothing to share: plain uvicorn, models load in the lifespan
+        serve(bind(args.host, args.port), threads)
+        return 0
+
+    # bound first: the port is taken (and connections queue in the backlog)
+    # while the models load
+    sock = bind(args.host, args.port)
+
+    from app.startup import pick_device
+
+    device = pick_device()
+    if device != "cpu":
+        logger.error(
+            "WORKERS=%d needs DEVICE=cpu (resolved to %s): %s cannot be used "
+            "in forked workers; run WORKERS=1 per device instead",
+            workers,
+            device,
+            device.upper(),
+        )
+        sock.close()
+        return 2
+
+    t0 = time.perf_counter()
+    try:
+        preload(device)
+    except Exception as e:
+        # workers start anyway and report it on /health, as a plain uvicorn
+        # run would; their lifespan retries the load
+        logger.exception("model preload failed")
+        model_state.error = str(e)
+    logger.info(
+        "preloaded models in %.1fs; %d worker(s) x %d torch thread(s)",
+        time.perf_counter() - t0,
+        workers,
+        threads,
+    )
+    # everything allocated so far lives as long as the process: keep the GC
+    # from scanning (and copy-on-write duplicating) it in every worker
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, float] = {}
+    stopping = False
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(workers):
+        children[spawn(sock, threads)] = time.monotonic()
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        logger.warning(
+            "worker %d exited with status %d; restarting",
+            pid,
+            os.waitstatus_to_exitcode(status),
+        )
+        if time.monotonic() - started < 1.0:
+            time.sleep(1.0)  # crash loop: don't spin
+        children[spawn(sock, threads)] = time.monotonic()
+
+    sock.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+"""
+Model loading for app.main's lifespan and the prefork master (app.serve).
+
+Importing this module pulls in torch, transformers, timm and torchvision
+(directly and through the domain services). app.main imports it in the
+startup worker thread, so the app module itself imports in well under a
+second and /health answers while the models load.
+"""
+
+import time
+from typing import Any
+
+import torch
+from transformers import CLIPModel, CLIPProcessor
+
+from app.core.config import settings
+from app.core.fetch_image import processor_input_side
+from app.core.metrics import MODEL_LOAD_SECONDS
+from app.core.state import model_state
+from app.domain.food_pipeline import FoodPipeline
+from app.domain.health_pipeline import HealthPipeline
+from app.domain.vision_router_service import ClipImageEncoder, VisionRouterService
+from app.infra.food_backend import OnnxFoodBackend, TorchFoodBackend, onnx_path
+from app.infra.predict_food import (
+    artifact_version,
+    build_model,
+    build_preprocess,
+    load_artifacts,
+    weights_file,
+)
+from app.infra.quantize import CLIP_IMAGE_MODULES, quantization_mode, quantize_int8
+from app.infra.warmup import compile_module, warm_up
+from app.infra.weights import from_pretrained_mmap
+
+
+def pick_device() -> str:
+    """
+    Device policy:
+    - DEVICE=cuda: use CUDA if available, else fallback cpu
+    - DEVICE=mps:  use MPS if available, else fallback cpu
+    - DEVICE=cpu:  force cpu
+    - DEVICE=auto: prefer cuda -> mps -> cpu
+    """
+    dev = settings.DEVICE
+
+    # Helper: safe check MPS (torch.backends.mps may not exist on non-mac builds)
+    has_mps = hasattr(torch.backends, "mps") and torch.backends.mps.is_available()
+
+    if dev == "cpu":
+        return "cpu"
+
+    if dev == "cuda":
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    if dev == "mps":
+        return "mps" if has_mps else "cpu"
+
+    # auto
+    if torch.cuda.is_available():
+        return "cuda"
+    if has_mps:
+        return "mps"
+    return "cpu"
+
+
+def apply_torch_threads() -> None:
+    # TORCH_THREADS=0: torch's default (app.serve sets it per worker)
+    threads = settings.TORCH_THREADS
+    if threads <= 0:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(threads)
+    except RuntimeError:
+        pass  # only settable before the first inter-op parallel call
+
+
+def load_food_model(cfg: dict, classes: list, device: str) -> None:
+    t0 = time.perf_counter()
+    if settings.FOOD_BACKEND == "onnx":
+        model = OnnxFoodBackend(onnx_path(), device)
+        version = ["onnx", artifact_version(onnx_path())]
+    elif settings.FOOD_BACKEND == "torch":
+        module = build_model(cfg)
+        module.to(device)
+        size = int(cfg["img_size"])
+        example = torch.zeros(1, 3, size, size, device=device)
+        model = TorchFoodBackend(compile_module(module, example), device=device)
+        version = ["torch", artifact_version(weights_file()), settings.MODEL_COMPILE]
+    else:
+        raise ValueError(f"Unknown FOOD_BACKEND: {settings.FOOD_BACKEND}")
+    model_state.model = model
+    model_state.food_model_version = "|".join(version)
+    model_state.preprocess = build_preprocess(cfg)
+    model_state.classes = classes
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - t0, model="food")
+
+
+def load_clip(device: str) -> None:
+    t0 = time.perf_counter()
+    model_state.clip_processor = CLIPProcessor.from_pretrained(settings.CLIP_MODEL_NAME)
+    model_state.clip_model = from_pretrained_mmap(CLIPModel, settings.CLIP_MODEL_NAME)
+    model_state.clip_model.eval()
+    model_state.clip_model.to(device)
+    if quantization_mode(device) == "int8":
+        quantize_int8(model_state.clip_model, CLIP_IMAGE_MODULES)
+    if settings.MODEL_COMPILE != "none":
+        side = processor_input_side(model_state.clip_processor)
+        model_state.clip_image_encoder = compile_module(
+            ClipImageEncoder(model_state.clip_model),
+            torch.zeros(1, 3, side, side, device=device),
+        )
+    MODEL_LOAD_SECONDS.set(time.perf_counter() - t0, model="clip")
+
+
+def load_models(state: Any) -> None:
+    """
+    Blocking part of startup, run in a worker thread: load the food model
+    and CLIP (unless the prefork master already did before forking this
+    worker), build the domain services on `state` (app.state) and warm them
+    up. model_state.warm is set last; the routes check it.
+    """
+    apply_torch_threads()
+    cfg, classes = load_artifacts()
+    device = pick_device()
+    model_state.device = device
+
+    # 1) load food model + 2) CLIP router
+    if model_state.model is None:
+        load_food_model(cfg, classes, device)
+    if model_state.clip_model is None:
+        load_clip(device)
+
+    # decode every image once, just large enough for the biggest model input
+    model_state.decode_side = max(
+        int(cfg["resize"]),
+        processor_input_side(model_state.clip_processor),
+        settings.BLIP_IMAGE_SIZE,
+    )
+
+    # 3) initialize domain services after model load
+    state.food_pipeline = FoodPipeline()
+    state.health_pipeline = HealthPipeline()
+    state.vision_router = VisionRouterService()
+
+    # 4) warm up before reporting ready (first calls are much slower)
+    if settings.MODEL_WARMUP:
+        t0 = time.perf_counter()
+        state.warmup = warm_up(
+            state.food_pipeline, state.vision_router, model_state.decode_side
+        )
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - t0, model="warmup")
+    model_state.warm = True
@@ -0,0 +1,326 @@
+"""
+Offline benchmark of the inference pipelines and the full app.
+
+Builds random / tiny checkpoints (see tools/bench_fixtures.py), starts a
+local image server and a fake Ollama, runs the app's own lifespan and then
+drives, at each concurrency level:
+- router: VisionRouterService.route
+- food:   FoodPipeline.analyze
+- health: HealthPipeline.analyze (BLIP-VQA)
+- food-image / chat / chat-stream: the FastAPI app through an in-process
+  ASGI client (fetch + decode + models + fake LLM)
+
+and reports throughput, p50/p95/p99 latency and peak RSS. CPU only, no
+network. Server settings (batching, workers, ...) are taken from the
+environment as usual; the vision and fetch caches default to off so every
+request does the full work.
+
+Run from serve/:
+    python -m tools.bench --concurrency 1,4,16 --requests 64 --json bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from tools.bench_fixtures import (
+    FakeOllamaServer,
+    StaticImageServer,
+    build_checkpoints,
+    synthetic_images,
+)
+
+TARGETS = ["router", "food", "health", "food-image", "chat", "chat-stream"]
+
+# knobs the benchmark sets unless they are already in the environment
+BENCH_DEFAULTS = {
+    "ENV": "dev",
+    "DEVICE": "cpu",
+    "VISION_CACHE_ENABLED": "0",
+    "FETCH_CACHE_ENABLED": "0",
+    "OLLAMA_WARMUP": "0",
+    "OLLAMA_KEEP_WARM_INTERVAL_S": "0",
+    "MODEL_LOAD_BACKGROUND": "0",
+}
+
+
+class RssSampler:
+    """
+    Peak resident set size while running, sampled from /proc (Linux);
+    elsewhere falls back to the process-lifetime peak from getrusage.
+    """
+
+    def __init__(self, interval_s: float = 0.02) -> None:
+        self.interval_s = interval_s
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._page = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+    def _current(self) -> Optional[int]:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * self._page
+        except OSError:
+            return None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            rss = self._current()
+            if rss is not None:
+                self.peak = max(self.peak, rss)
+            self._stop.wait(self.interval_s)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        if not self.peak:
+            # ru_maxrss: KB on Linux, bytes on macOS
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            self.peak = maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+async def measure(
+    call: Callable[[int], Awaitable[Any]], concurrency: int, total: int, warmup: int
+) -> Dict[str, Any]:
+    """
+    Closed loop: `concurrency` workers issue `total` calls back to back.
+    """
+    for i in range(warmup):
+        await call(i)
+
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    next_i = 0
+
+    async def worker() -> None:
+        nonlocal next_i
+        while next_i < total:
+            i = next_i
+            next_i += 1
+            t0 = time.perf_counter()
+            try:
+                await call(i)
+            except Exception as e:
+                name = type(e).__name__
+                errors[name] = errors.get(name, 0) + 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+
+    with RssSampler() as rss:
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        wall = time.perf_counter() - t0
+
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / wall, 2) if wall else 0.0,
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "mean_ms": round(float(ms.mean()), 1),
+        "peak_rss_mb": round(rss.peak / 2**20, 1),
+    }
+
+
+async def run(args: argparse.Namespace, image_names: List[str], image_base: str):
+    import httpx
+
+    from app.core.fetch_image import decode_image
+    from app.core.state import model_state
+    from app.infra.blip_loader import ensure_blip_loaded
+    from app.infra.preprocess import prepare_image
+    from app.main import app
+
+    results: List[Dict[str, Any]] = []
+    async with app.router.lifespan_context(app):
+        if model_state.error:
+            raise SystemExit(f"startup failed: {model_state.error}")
+
+        t0 = time.perf_counter()
+        await ensure_blip_loaded()
+        blip_load_s = time.perf_counter() - t0
+
+        images = [
+            decode_image(Path(args.image_dir, name).read_bytes())
+            for name in image_names
+        ]
+
+        def image(i: int):
+            # fresh PreparedImage per call: preprocessing is part of the cost
+            return prepare_image(images[i % len(images)])
+
+        def url(i: int) -> str:
+            return f"{image_base}/{image_names[i % len(image_names)]}"
+
+        transport = httpx.ASGITransport(app=app)
+        client = httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=120
+        )
+
+        async def post(path: str, body: Dict[str, Any]) -> None:
+            r = await client.post(path, json=body)
+            if r.status_code != 200:
+                raise RuntimeError(f"HTTP {r.status_code}")
+
+        def chat_body(i: int) -> Dict[str, Any]:
+            return {
+                "session_id": f"bench-{i}",
+                "message": "What is this and how many calories does it have?",
+                "image_url": url(i),
+                "user_context": {"user_id": "bench"},
+            }
+
+        async def chat_stream(i: int) -> None:
+            path = "/api/v1/inference/chat:stream"
+            async with client.stream("POST", path, json=chat_body(i)) as r:
+                if r.status_code != 200:
+                    raise RuntimeError(f"HTTP {r.status_code}")
+                async for line in r.aiter_lines():
+                    if '"event": "error"' in line:
+                        raise RuntimeError("stream error event")
+
+        calls: Dict[str, Callable[[int], Awaitable[Any]]] = {
+            "router": lambda i: app.state.vision_router.route(image(i)),
+            "food": lambda i: app.state.food_pipeline.analyze(image(i), top_k=3),
+            "health": lambda i: app.state.health_pipeline.analyze(
+                image(i), clip_best_key=""
+            ),
+            "food-image": lambda i: post(
+                "/api/v1/inference/food-image", {"image_url": url(i)}
+            ),
+            "chat": lambda i: post("/api/v1/inference/chat", chat_body(i)),
+            "chat-stream": chat_stream,
+        }
+
+        try:
+            for target in args.targets:
+                for c in args.concurrency:
+                    r = await measure(calls[target], c, args.requests, args.warmup)
+                    r["target"] = target
+                    results.append(r)
+                    _print_row(r)
+        finally:
+            await client.aclose()
+
+    return results, blip_load_s
+
+
+def _print_row(r: Dict[str, Any]) -> None:
+    errors = sum(r["errors"].values())
+    print(
+        f"{r['target']:<12} c={r['concurrency']:<4} "
+        f"{r['throughput_rps']:>8.2f} req/s  "
+        f"p50 {r['p50_ms']:>8.1f}  p95 {r['p95_ms']:>8.1f}  p99 {r['p99_ms']:>8.1f} ms  "
+        f"rss {r['peak_rss_mb']:>7.1f} MB  errors {errors}",
+        flush=True,
+    )
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        )
+        return out.stdout.strip()
+    except Exception:
+        return None
+
+
+def _int_list(s: str) -> List[int]:
+    return [int(v) for v in s.split(",") if v]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=48, help="per level")
+    parser.add_argument("--warmup", type=int, default=4, help="per level")
+    parser.add_argument(
+        "--targets",
+        type=lambda s: s.split(","),
+        default=TARGETS,
+        help=f"comma-separated subset of {','.join(TARGETS)}",
+    )
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--workdir", help="where checkpoints and images go (default: a temp dir)"
+    )
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    unknown = set(args.targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="bench-"))
+    print(f"building checkpoints in {workdir} ...", flush=True)
+    env = build_checkpoints(workdir, seed=args.seed)
+
+    images = synthetic_images(seed=args.seed)
+    args.image_dir = str(workdir / "images")
+    os.makedirs(args.image_dir, exist_ok=True)
+    for name, (data, _) in images.items():
+        Path(args.image_dir, name).write_bytes(data)
+
+    with StaticImageServer(images) as image_server, FakeOllamaServer(
+        latency_s=args.llm_latency_ms / 1000
+    ) as ollama:
+        # must be in place before `app` is imported (settings read env once)
+        os.environ.update(env)
+        os.environ["OLLAMA_BASE_URL"] = ollama.url
+        for key, value in BENCH_DEFAULTS.items():
+            os.environ.setdefault(key, value)
+
+        results, blip_load_s = asyncio.run(run(args, sorted(images), image_server.url))
+
+    import torch
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "torch": torch.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "cpu_count": os.cpu_count(),
+        "images": sorted(images),
+        "settings": {
+            k: os.environ[k]
+            for k in sorted(os.environ)
+            if k in BENCH_DEFAULTS or k.endswith(("_BATCH_MAX_SIZE", "_CONCURRENCY"))
+        },
+        "blip_load_s": round(blip_load_s, 3),
+        "results": results,
+    }
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2))
+        print(f"wrote {args.json}")
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
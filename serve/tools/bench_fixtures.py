@@ -0,0 +1,328 @@
+"""
+Offline fixtures for the benchmark / replay tools (no network, CPU only):
+
+- build_checkpoints(): randomly initialized food model (same arch and input
+  size as artifacts/model_config.json) plus tiny CLIP and BLIP-VQA
+  checkpoints with the real processor defaults, saved with save_pretrained
+  so the server loads them through its normal startup path.
+- synthetic_images(): JPEG / PNG / WEBP images of varied sizes.
+- StaticImageServer / FakeOllamaServer: local http.server instances
+  standing in for the image host and Ollama.
+"""
+
+import io
+import json
+import string
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+REPO_ARTIFACTS = Path(__file__).resolve().parents[2] / "artifacts"
+
+IMAGE_SPECS: List[Tuple[Tuple[int, int], str]] = [
+    ((320, 240), "JPEG"),
+    ((640, 480), "JPEG"),
+    ((1280, 960), "JPEG"),
+    ((3024, 4032), "JPEG"),
+    ((800, 800), "PNG"),
+    ((1024, 768), "WEBP"),
+]
+CONTENT_TYPES = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+
+def _byte_level_vocab() -> Dict[str, int]:
+    # GPT-2 style byte -> unicode table (CLIP's BPE alphabet), no merges
+    bs = (
+        list(range(ord("!"), ord("~") + 1))
+        + list(range(ord("¡"), ord("¬") + 1))
+        + list(range(ord("®"), ord("ÿ") + 1))
+    )
+    cs = bs[:]
+    n = 0
+    for b in range(256):
+        if b not in bs:
+            bs.append(b)
+            cs.append(256 + n)
+            n += 1
+    chars = [chr(c) for c in cs]
+    vocab = {c: i for i, c in enumerate(chars)}
+    for c in chars:
+        vocab[c + "</w>"] = len(vocab)
+    vocab["<|startoftext|>"] = len(vocab)
+    vocab["<|endoftext|>"] = len(vocab)
+    return vocab
+
+
+def _save_food(root: Path, seed: int) -> Path:
+    import timm
+    import torch
+
+    cfg = json.loads((REPO_ARTIFACTS / "model_config.json").read_text())
+    classes = json.loads((REPO_ARTIFACTS / "food101_classes.json").read_text())
+    out = root / "artifacts"
+    out.mkdir(parents=True, exist_ok=True)
+
+    torch.manual_seed(seed)
+    model = timm.create_model(
+        cfg["arch"], pretrained=False, num_classes=cfg["num_classes"]
+    )
+    torch.save(model.state_dict(), out / "best.pt")
+    (out / "model_config.json").write_text(json.dumps(cfg))
+    (out / "food101_classes.json").write_text(json.dumps(classes))
+    return out
+
+
+def _save_clip(root: Path, seed: int) -> Path:
+    import torch
+    from transformers import (
+        CLIPConfig,
+        CLIPImageProcessor,
+        CLIPModel,
+        CLIPProcessor,
+        CLIPTokenizer,
+    )
+
+    out = root / "clip"
+    out.mkdir(parents=True, exist_ok=True)
+    vocab = _byte_level_vocab()
+    (out / "vocab.json").write_text(json.dumps(vocab))
+    (out / "merges.txt").write_text("#version: 0.2\n")
+    tokenizer = CLIPTokenizer(str(out / "vocab.json"), str(out / "merges.txt"))
+    processor = CLIPProcessor(image_processor=CLIPImageProcessor(), tokenizer=tokenizer)
+
+    torch.manual_seed(seed)
+    config = CLIPConfig(
+        text_config=dict(
+            vocab_size=len(vocab),
+            hidden_size=64,
+            intermediate_size=128,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            max_position_embeddings=77,
+            bos_token_id=vocab["<|startoftext|>"],
+            eos_token_id=vocab["<|endoftext|>"],
+            pad_token_id=vocab["<|endoftext|>"],
+        ),
+        vision_config=dict(
+            hidden_size=64,
+            intermediate_size=128,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            image_size=224,
+            patch_size=32,
+        ),
+        projection_dim=32,
+    )
+    CLIPModel(config).save_pretrained(out)
+    processor.save_pretrained(out)
+    return out
+
+
+def _save_blip(root: Path, seed: int) -> Path:
+    import torch
+    from transformers import (
+        BertTokenizerFast,
+        BlipConfig,
+        BlipForQuestionAnswering,
+        BlipImageProcessor,
+        BlipProcessor,
+    )
+
+    out = root / "blip"
+    out.mkdir(parents=True, exist_ok=True)
+    words = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", "[DEC]"]
+    words += list(string.ascii_lowercase) + list(string.digits) + ["?", ".", ","]
+    (out / "vocab.txt").write_text("\n".join(words))
+    tokenizer = BertTokenizerFast(str(out / "vocab.txt"), bos_token="[DEC]")
+    processor = BlipProcessor(image_processor=BlipImageProcessor(), tokenizer=tokenizer)
+
+    torch.manual_seed(seed)
+    config = BlipConfig(
+        text_config=dict(
+            vocab_size=len(words),
+            hidden_size=64,
+            intermediate_size=128,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            encoder_hidden_size=64,
+            bos_token_id=words.index("[DEC]"),
+            pad_token_id=words.index("[PAD]"),
+            sep_token_id=words.index("[SEP]"),
+        ),
+        vision_config=dict(
+            hidden_size=64,
+            intermediate_size=128,
+            num_hidden_layers=2,
+            num_attention_heads=2,
+            image_size=384,
+            patch_size=32,
+        ),
+    )
+    BlipForQuestionAnswering(config).save_pretrained(out)
+    processor.save_pretrained(out)
+    return out
+
+
+def build_checkpoints(root: Path, seed: int = 0) -> Dict[str, str]:
+    """
+    Write all checkpoints under `root`; returns the env vars that point the
+    server at them (set them before importing `app`).
+    """
+    root = Path(root)
+    return {
+        "ARTIFACTS_DIR": str(_save_food(root, seed)),
+        "CLIP_MODEL_NAME": str(_save_clip(root, seed)),
+        "BLIP_VQA_MODEL_NAME": str(_save_blip(root, seed)),
+        "HF_HUB_OFFLINE": "1",
+        "TRANSFORMERS_OFFLINE": "1",
+    }
+
+
+def synthetic_image(size: Tuple[int, int], seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    w, h = size
+    # low-frequency noise upsampled: closer to photo statistics than white noise
+    small = (rng.random((max(1, h // 8), max(1, w // 8), 3)) * 255).astype(np.uint8)
+    return Image.fromarray(small).resize((w, h), Image.BILINEAR)
+
+
+def synthetic_images(
+    specs: List[Tuple[Tuple[int, int], str]] = IMAGE_SPECS, seed: int = 0
+) -> Dict[str, Tuple[bytes, str]]:
+    """
+    name -> (encoded bytes, content-type), e.g. "640x480.jpg".
+    """
+    images: Dict[str, Tuple[bytes, str]] = {}
+    for i, (size, fmt) in enumerate(specs):
+        buf = io.BytesIO()
+        synthetic_image(size, seed + i).save(buf, fmt, quality=90)
+        ext = "jpg" if fmt == "JPEG" else fmt.lower()
+        images[f"{size[0]}x{size[1]}.{ext}"] = (buf.getvalue(), CONTENT_TYPES[fmt])
+    return images
+
+
+class _Server:
+    def __init__(self, handler: type) -> None:
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "_Server":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class StaticImageServer(_Server):
+    """
+    Serves `images` (name -> (bytes, content-type)) at /<name>.
+    """
+
+    def __init__(self, images: Dict[str, Tuple[bytes, str]]) -> None:
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                entry = images.get(self.path.lstrip("/"))
+                if entry is None:
+                    self.send_error(404)
+                    return
+                data, content_type = entry
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "max-age=60")
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:
+                pass
+
+        super().__init__(Handler)
+
+
+FAKE_LLM_REPLY = json.dumps(
+    {
+        "intent_detected": "food_inquiry",
+        "text_response": "This looks like a bowl of pho. It is a Vietnamese noodle "
+        "soup; a typical bowl has about 400-500 kcal.",
+    }
+)
+
+
+class FakeOllamaServer(_Server):
+    """
+    Minimal Ollama: /api/chat (streaming and not) answers FAKE_LLM_REPLY after
+    `latency_s`, streamed in `chunk_chars`-sized pieces; /api/generate is a
+    no-op load.
+    """
+
+    def __init__(
+        self,
+        latency_s: float = 0.0,
+        chunk_chars: int = 8,
+        reply: Optional[str] = None,
+    ) -> None:
+        reply = reply or FAKE_LLM_REPLY
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _json(self, obj: dict) -> None:
+                body = json.dumps(obj).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if latency_s:
+                    time.sleep(latency_s)
+                done = {
+                    "done": True,
+                    "prompt_eval_count": 200,
+                    "eval_count": len(reply) // 4,
+                }
+                if self.path == "/api/generate":
+                    self._json({"model": payload.get("model"), "done": True})
+                elif not payload.get("stream"):
+                    self._json(
+                        {"message": {"role": "assistant", "content": reply}, **done}
+                    )
+                else:
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    lines = [
+                        {
+                            "message": {"content": reply[i : i + chunk_chars]},
+                            "done": False,
+                        }
+                        for i in range(0, len(reply), chunk_chars)
+                    ] + [done]
+                    for line in lines:
+                        data = (json.dumps(line) + "\n").encode()
+                        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+                    self.wfile.write(b"0\r\n\r\n")
+
+            def log_message(self, *args) -> None:
+                pass
+
+        super().__init__(Handler)
@@ -0,0 +1,135 @@
+"""
+Import-time budget for the server module.
+
+Imports `app.main` in a fresh interpreter with `python -X importtime` and
+fails if it takes longer than --budget-ms or pulls in any of the ML
+libraries (torch, transformers, timm, torchvision, onnxruntime): those
+belong in the model-loading path (app.startup), which runs after the port
+is bound. With --probe it also starts the server and measures the time
+until /health answers, which is what liveness probes see.
+
+Run from serve/:
+    python -m tools.check_import_time --budget-ms 1500
+    python -m tools.check_import_time --probe
+"""
+
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from typing import Dict, List, Tuple
+
+HEAVY_MODULES = ("torch", "transformers", "timm", "torchvision", "onnxruntime")
+
+# import time:   self [us] | cumulative | imported package
+LINE_RE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def import_times(module: str) -> Tuple[float, Dict[str, float]]:
+    """
+    (wall ms of `import module`, cumulative ms per top-level package).
+    """
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    wall_ms = (time.perf_counter() - t0) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    packages: Dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        m = LINE_RE.match(line)
+        if m is None:
+            continue
+        cumulative_us, name = int(m.group(2)), m.group(4)
+        top = name.split(".")[0]
+        # first-level entries of each package carry the package's cumulative time
+        packages[top] = max(packages.get(top, 0.0), cumulative_us / 1000)
+    return wall_ms, packages
+
+
+def probe_health(port: int, timeout_s: float) -> float:
+    """
+    Start `python -m app.serve` and return seconds until /health answers.
+    """
+    env = dict(os.environ, WORKERS="1", PORT=str(port))
+    t0 = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "app.serve", "--host", "127.0.0.1"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - t0 < timeout_s:
+            if proc.poll() is not None:
+                raise SystemExit(f"server exited with status {proc.returncode}")
+            try:
+                url = f"http://127.0.0.1:{port}/health"
+                with urllib.request.urlopen(url, timeout=1):
+                    return time.perf_counter() - t0
+            except OSError:
+                time.sleep(0.05)
+        raise SystemExit(f"/health did not answer within {timeout_s:.0f}s")
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=1500)
+    parser.add_argument("--top", type=int, default=8, help="slowest packages shown")
+    parser.add_argument("--probe", action="store_true")
+    parser.add_argument("--probe-budget-s", type=float, default=5.0)
+    args = parser.parse_args()
+
+    wall_ms, packages = import_times(args.module)
+    total_ms = packages.get(args.module.split(".")[0], wall_ms)
+    print(
+        f"import {args.module}: {total_ms:.0f} ms (interpreter total {wall_ms:.0f} ms)"
+    )
+    for name, ms in sorted(packages.items(), key=lambda kv: -kv[1])[: args.top]:
+        print(f"  {name:<24} {ms:8.1f} ms")
+
+    failures: List[str] = []
+    heavy = [name for name in HEAVY_MODULES if name in packages]
+    if heavy:
+        failures.append(f"imports {', '.join(heavy)} at module level")
+    if total_ms > args.budget_ms:
+        failures.append(f"{total_ms:.0f} ms > budget {args.budget_ms:.0f} ms")
+
+    if args.probe:
+        health_s = probe_health(free_port(), timeout_s=max(30.0, args.probe_budget_s))
+        print(f"/health answering after {health_s:.2f} s")
+        if health_s > args.probe_budget_s:
+            failures.append(
+                f"/health after {health_s:.2f} s > budget {args.probe_budget_s:.1f} s"
+            )
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
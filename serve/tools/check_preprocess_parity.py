@@ -0,0 +1,97 @@
+"""
+Output parity check: shared tensor preprocessing vs the original processors.
+
+Compares, on synthetic images of several sizes, the model inputs produced by
+PreparedImage + TensorPreprocess against:
+- the food model's torchvision pipeline (build_preprocess)
+- CLIPImageProcessor (settings.CLIP_MODEL_NAME)
+- BlipImageProcessor (settings.BLIP_VQA_MODEL_NAME)
+
+Exits non-zero if any max abs difference exceeds --tol (normalized units;
+one uint8 level after ImageNet/CLIP normalization is ~0.017).
+
+Run from serve/:
+    python -m tools.check_preprocess_parity
+"""
+
+import argparse
+import sys
+
+import numpy as np
+from PIL import Image
+from transformers import BlipImageProcessor, CLIPImageProcessor
+
+from app.core.config import settings
+from app.infra.predict_food import build_preprocess, load_artifacts
+from app.infra.preprocess import PreparedImage, TensorPreprocess
+
+SIZES = [(224, 224), (640, 480), (480, 640), (1000, 750), (333, 517)]
+
+
+def synthetic_image(size, seed: int) -> Image.Image:
+    rng = np.random.default_rng(seed)
+    w, h = size
+    # low-frequency noise upsampled: closer to photo statistics than white noise
+    small = (rng.random((max(1, h // 8), max(1, w // 8), 3)) * 255).astype(np.uint8)
+    return Image.fromarray(small).resize((w, h), Image.BILINEAR)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tol", type=float, default=0.035)
+    parser.add_argument(
+        "--default-processors",
+        action="store_true",
+        help="use library-default CLIP/BLIP processor configs (no hub access)",
+    )
+    args = parser.parse_args()
+
+    cfg, _ = load_artifacts()
+    food_tf = build_preprocess(cfg)
+    if args.default_processors:
+        clip_ip, blip_ip = CLIPImageProcessor(), BlipImageProcessor()
+    else:
+        clip_ip = CLIPImageProcessor.from_pretrained(settings.CLIP_MODEL_NAME)
+        blip_ip = BlipImageProcessor.from_pretrained(settings.BLIP_VQA_MODEL_NAME)
+
+    checks = {
+        "food": (TensorPreprocess.from_torchvision(food_tf), food_tf),
+        "clip": (
+            TensorPreprocess.from_hf(clip_ip),
+            lambda im: clip_ip(images=im, return_tensors="pt")["pixel_values"][0],
+        ),
+        "blip": (
+            TensorPreprocess.from_hf(blip_ip),
+            lambda im: blip_ip(images=im, return_tensors="pt")["pixel_values"][0],
+        ),
+    }
+
+    failed = False
+    for i, size in enumerate(SIZES):
+        image = synthetic_image(size, seed=i)
+        prepared = PreparedImage(image)
+        for name, (spec, reference) in checks.items():
+            if spec is None:
+                print(f"{name:5s} {size}: no tensor equivalent (processor fallback)")
+                continue
+            ours = prepared.input_for(spec)
+            ref = reference(image)
+            if ours.shape != ref.shape:
+                print(
+                    f"{name:5s} {size}: SHAPE {tuple(ours.shape)} != {tuple(ref.shape)}"
+                )
+                failed = True
+                continue
+            diff = (ours - ref).abs()
+            ok = float(diff.max()) <= args.tol
+            failed |= not ok
+            print(
+                f"{name:5s} {size}: max={float(diff.max()):.4f} "
+                f"mean={float(diff.mean()):.5f} {'ok' if ok else 'FAIL'}"
+            )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
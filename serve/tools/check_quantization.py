@@ -0,0 +1,160 @@
+"""
+Accuracy check for QUANTIZE=int8 against the fp32 models.
+
+Loads CLIP and BLIP-VQA (the models QUANTIZE applies to) the way the
+server does, makes an int8 copy of each (same quantize_int8 calls as at
+startup) and compares on a sample set:
+- CLIP:  agreement of the routing decision (is_food and best label)
+- BLIP:  exact-match rate of the VQA answers
+
+plus state_dict size and mean latency per call. Exits non-zero if routing
+agreement falls below --min-agreement.
+
+Images come from --images (a directory of jpg/png/webp files) or are
+synthetic. --tiny uses the offline random checkpoints from
+tools/bench_fixtures.py instead of the configured models (smoke test only:
+agreement on random weights says little).
+
+Run from serve/:
+    python -m tools.check_quantization --images ./samples
+"""
+
+import argparse
+import copy
+import io
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+from PIL import Image
+
+from tools.bench_fixtures import build_checkpoints, synthetic_image
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def load_images(directory: str, limit: int) -> List[Image.Image]:
+    paths = sorted(
+        p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_EXTS
+    )
+    return [Image.open(p).convert("RGB") for p in paths[:limit]]
+
+
+def state_dict_mb(model: Any) -> float:
+    import torch
+
+    buf = io.BytesIO()
+    torch.save(model.state_dict(), buf)
+    return buf.tell() / 2**20
+
+
+def timed(fn: Callable[[Any], Any], items: List[Any]) -> tuple:
+    t0 = time.perf_counter()
+    out = [fn(item) for item in items]
+    return out, (time.perf_counter() - t0) * 1000 / max(1, len(items))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--images", help="directory of sample images")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--min-agreement", type=float, default=0.9)
+    parser.add_argument("--skip-blip", action="store_true")
+    parser.add_argument(
+        "--tiny", action="store_true", help="offline random checkpoints"
+    )
+    args = parser.parse_args()
+
+    if args.tiny:
+        # before `app` is imported: settings read the environment once
+        os.environ.update(build_checkpoints(Path(tempfile.mkdtemp(prefix="quant-"))))
+
+    import torch
+    from transformers import (
+        BlipForQuestionAnswering,
+        BlipProcessor,
+        CLIPModel,
+        CLIPProcessor,
+    )
+
+    from app.core.config import settings
+    from app.core.state import model_state
+    from app.domain.health_pipeline import select_questions
+    from app.domain.vision_router_service import VisionRouterService
+    from app.infra.blip_vqa import BlipVQA
+    from app.infra.preprocess import prepare_image
+    from app.infra.quantize import CLIP_IMAGE_MODULES, quantize_int8
+
+    torch.set_grad_enabled(False)
+    model_state.device = "cpu"
+
+    if args.images:
+        images = load_images(args.images, args.limit)
+    else:
+        sizes = [(640, 480), (480, 640), (1024, 768), (300, 300)]
+        images = [
+            synthetic_image(sizes[i % len(sizes)], i)
+            for i in range(min(args.limit, 16))
+        ]
+    if not images:
+        parser.error("no images")
+    print(f"{len(images)} images")
+
+    failed = False
+
+    # CLIP router
+    processor = CLIPProcessor.from_pretrained(settings.CLIP_MODEL_NAME)
+    fp32 = CLIPModel.from_pretrained(settings.CLIP_MODEL_NAME).eval()
+    int8 = quantize_int8(copy.deepcopy(fp32), CLIP_IMAGE_MODULES)
+    model_state.clip_processor = processor
+
+    def router(model: Any) -> VisionRouterService:
+        model_state.clip_model = model
+        return VisionRouterService()
+
+    router_ref, router_q = router(fp32), router(int8)
+    ref, ref_ms = timed(lambda im: router_ref.route_sync(prepare_image(im)), images)
+    out, out_ms = timed(lambda im: router_q.route_sync(prepare_image(im)), images)
+    is_food = sum(a.is_food == b.is_food for a, b in zip(ref, out)) / len(images)
+    best = sum(a.best_key == b.best_key for a, b in zip(ref, out)) / len(images)
+    print(
+        f"clip: is_food agreement {is_food:.3f}, best label agreement {best:.3f}, "
+        f"{state_dict_mb(fp32):.1f} -> {state_dict_mb(int8):.1f} MB, "
+        f"{ref_ms:.1f} -> {out_ms:.1f} ms/image"
+    )
+    failed |= is_food < args.min_agreement
+
+    # BLIP-VQA
+    if not args.skip_blip:
+        processor = BlipProcessor.from_pretrained(settings.BLIP_VQA_MODEL_NAME)
+        fp32 = BlipForQuestionAnswering.from_pretrained(
+            settings.BLIP_VQA_MODEL_NAME
+        ).eval()
+        int8 = quantize_int8(copy.deepcopy(fp32))
+        model_state.blip_vqa_processor = processor
+        questions = select_questions("")
+
+        def vqa(model: Any) -> BlipVQA:
+            model_state.blip_vqa_model = model
+            return BlipVQA()
+
+        vqa_ref, vqa_q = vqa(fp32), vqa(int8)
+        subset = images[: min(len(images), 10)]
+        ref, ref_ms = timed(lambda im: vqa_ref.ask_many(im, questions), subset)
+        out, out_ms = timed(lambda im: vqa_q.ask_many(im, questions), subset)
+        same = sum(a[q] == b[q] for a, b in zip(ref, out) for q in questions)
+        print(
+            f"blip: answer exact match {same / (len(subset) * len(questions)):.3f}, "
+            f"{state_dict_mb(fp32):.1f} -> {state_dict_mb(int8):.1f} MB, "
+            f"{ref_ms:.1f} -> {out_ms:.1f} ms/image"
+        )
+
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Answer parity check: batched BLIP-VQA (VQA_BATCHED=1) vs one question at a
+time (VQA_BATCHED=0).
+
+Loads BLIP-VQA the way the server does and asks every question in
+app/domain/vqa_questions.py (mixed token lengths) about each image through
+both paths, with the decoded image and with the shared-preprocessing
+PreparedImage as input. Exits non-zero on any differing answer: the batched
+path must be exact, not approximately right.
+
+Images come from --images (a directory of jpg/png/webp files) or are
+synthetic. --tiny uses the offline random checkpoints from
+tools/bench_fixtures.py instead of the configured model.
+
+Run from serve/:
+    python -m tools.check_vqa_parity --images ./samples
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import List
+
+from PIL import Image
+
+from tools.bench_fixtures import build_checkpoints, synthetic_image
+
+IMAGE_EXTS = {".jpg", ".jpeg", ".png", ".webp"}
+SIZES = [(640, 480), (480, 640), (384, 384), (1000, 750)]
+
+
+def load_images(directory: str, limit: int) -> List[Image.Image]:
+    paths = sorted(
+        p for p in Path(directory).iterdir() if p.suffix.lower() in IMAGE_EXTS
+    )
+    return [Image.open(p).convert("RGB") for p in paths[:limit]]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--images", help="directory of sample images")
+    parser.add_argument("--limit", type=int, default=16)
+    parser.add_argument("--max-new-tokens", type=int, default=16)
+    parser.add_argument(
+        "--tiny", action="store_true", help="offline random checkpoints"
+    )
+    args = parser.parse_args()
+
+    if args.tiny:
+        # before `app` is imported: settings read the environment once
+        os.environ.update(build_checkpoints(Path(tempfile.mkdtemp(prefix="vqa-"))))
+
+    import transformers
+
+    from app.core.state import model_state
+    from app.domain import vqa_questions
+    from app.infra.blip_loader import blip_loader
+    from app.infra.blip_vqa import BlipVQA
+    from app.infra.preprocess import PreparedImage
+
+    model_state.device = "cpu"
+    blip_loader.load_blocking()
+    if blip_loader.state != "loaded":
+        raise SystemExit(f"BLIP-VQA failed to load: {blip_loader.error}")
+    vqa = BlipVQA()
+
+    questions = list(
+        dict.fromkeys(
+            q.text
+            for group in (
+                vqa_questions.GENERIC,
+                vqa_questions.MEDICINE,
+                vqa_questions.MED_REPORT,
+                vqa_questions.WOUND,
+            )
+            for q in group
+        )
+    )
+    if args.images:
+        images = load_images(args.images, args.limit)
+    else:
+        images = [synthetic_image(size, seed=i) for i, size in enumerate(SIZES)]
+
+    total = mismatches = 0
+    for i, pil in enumerate(images):
+        for label, image in (("pil", pil), ("prepared", PreparedImage(pil))):
+            batched = vqa._ask_batched(image, questions, args.max_new_tokens)
+            sequential = vqa._ask_sequential(image, questions, args.max_new_tokens)
+            for q in questions:
+                total += 1
+                if batched[q] != sequential[q]:
+                    mismatches += 1
+                    print(
+                        f"image {i} ({label}): {q!r}: "
+                        f"batched {batched[q]!r} != sequential {sequential[q]!r}"
+                    )
+
+    print(
+        f"transformers {transformers.__version__}: "
+        f"{total - mismatches}/{total} answers identical"
+    )
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
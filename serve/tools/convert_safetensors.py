@@ -0,0 +1,81 @@
+"""
+Convert model weights to safetensors so the server can memory-map them.
+
+- default: <artifacts>/best.pt -> <artifacts>/best.safetensors (the server
+  prefers it when present)
+- --hf NAME --kind clip|blip --out DIR: re-save a Hugging Face checkpoint
+  that only ships pytorch_model.bin as a local safetensors model (+
+  processor); point CLIP_MODEL_NAME / BLIP_VQA_MODEL_NAME at DIR.
+
+Run from serve/:
+    python -m tools.convert_safetensors
+    python -m tools.convert_safetensors --hf Salesforce/blip-vqa-base --kind blip --out ../artifacts/blip
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import torch
+
+
+def convert_food(src: Path, dst: Path) -> None:
+    from safetensors.torch import load_file, save_file
+
+    state = torch.load(src, map_location="cpu", weights_only=True)
+    if isinstance(state, dict) and "state_dict" in state:
+        state = state["state_dict"]
+    # safetensors stores each tensor once: no shared storage, no views
+    state = {k: v.detach().clone().contiguous() for k, v in state.items()}
+    save_file(state, str(dst), metadata={"format": "pt", "source": src.name})
+
+    loaded = load_file(str(dst))
+    if loaded.keys() != state.keys() or any(
+        not torch.equal(loaded[k], v) for k, v in state.items()
+    ):
+        raise SystemExit(f"verification failed: {dst} does not match {src}")
+    print(f"wrote {dst} ({len(state)} tensors, {dst.stat().st_size / 2**20:.1f} MB)")
+
+
+def convert_hf(name: str, kind: str, out: Path) -> None:
+    from transformers import (
+        BlipForQuestionAnswering,
+        BlipProcessor,
+        CLIPModel,
+        CLIPProcessor,
+    )
+
+    model_cls, processor_cls = {
+        "clip": (CLIPModel, CLIPProcessor),
+        "blip": (BlipForQuestionAnswering, BlipProcessor),
+    }[kind]
+    model_cls.from_pretrained(name).save_pretrained(out, safe_serialization=True)
+    processor_cls.from_pretrained(name).save_pretrained(out)
+    print(f"wrote {out}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--src", type=Path, help="default: <artifacts>/best.pt")
+    parser.add_argument("--hf", help="Hugging Face model id or path to convert")
+    parser.add_argument("--kind", choices=["clip", "blip"])
+    parser.add_argument("--out", type=Path)
+    args = parser.parse_args()
+
+    if args.hf:
+        if not args.kind or not args.out:
+            parser.error("--hf needs --kind and --out")
+        convert_hf(args.hf, args.kind, args.out)
+        return 0
+
+    from app.infra.predict_food import ARTIFACTS_DIR
+
+    src = args.src or ARTIFACTS_DIR / "best.pt"
+    if not src.exists():
+        parser.error(f"missing {src}")
+    convert_food(src, args.out or src.with_suffix(".safetensors"))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Export the food classifier to ONNX for FOOD_BACKEND=onnx, then check it
+against the torch model.
+
+Reads best.pt + model_config.json from the artifacts dir (ARTIFACTS_DIR),
+writes an opset-17 graph with a dynamic batch axis (input "input", output
+"logits") and compares both backends on the same preprocessed batches:
+max |logit diff| and top-1 agreement. Exits non-zero if either is off.
+
+Run from serve/:
+    python -m tools.export_onnx                # -> <artifacts>/food.onnx
+    python -m tools.export_onnx --check-only   # parity of an existing export
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, List
+
+import torch
+
+from app.infra.food_backend import OnnxFoodBackend, TorchFoodBackend, onnx_path
+from app.infra.predict_food import build_model, build_preprocess, load_artifacts
+from tools.bench_fixtures import synthetic_image
+
+
+def export(module: torch.nn.Module, img_size: int, out: Path, opset: int) -> None:
+    out.parent.mkdir(parents=True, exist_ok=True)
+    # TorchScript exporter: no onnx / onnxscript dependency, and EfficientNet
+    # has no data-dependent control flow that would need torch.export
+    torch.onnx.export(
+        module,
+        (torch.zeros(1, 3, img_size, img_size),),
+        str(out),
+        input_names=["input"],
+        output_names=["logits"],
+        dynamic_axes={"input": {0: "batch"}, "logits": {0: "batch"}},
+        opset_version=opset,
+        dynamo=False,
+    )
+
+
+def mean_ms(fn: Callable[[Any], Any], batches: List[torch.Tensor]) -> float:
+    fn(batches[0])  # warm-up
+    t0 = time.perf_counter()
+    for x in batches:
+        fn(x)
+    return (time.perf_counter() - t0) * 1000 / len(batches)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--out", type=Path, help="default: FOOD_ONNX_PATH")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--check-only", action="store_true")
+    parser.add_argument("--batch-sizes", default="1,4,8")
+    parser.add_argument("--atol", type=float, default=1e-3, help="max |logit diff|")
+    args = parser.parse_args()
+
+    out = args.out or onnx_path()
+    cfg, classes = load_artifacts()
+    preprocess = build_preprocess(cfg)
+    reference = TorchFoodBackend(build_model(cfg))
+
+    if not args.check_only:
+        export(reference.module, int(cfg["img_size"]), out, args.opset)
+        print(f"wrote {out} ({out.stat().st_size / 2**20:.1f} MB)")
+
+    candidate = OnnxFoodBackend(out)
+    batches = []
+    seed = 0
+    for n in (int(v) for v in args.batch_sizes.split(",") if v):
+        images = [synthetic_image((640, 480), seed + i) for i in range(n)]
+        batches.append(torch.stack([preprocess(image) for image in images]))
+        seed += n
+
+    max_diff, agree, total = 0.0, 0, 0
+    for x in batches:
+        a, b = reference(x), candidate(x)
+        max_diff = max(max_diff, float((a - b).abs().max()))
+        agree += int((a.argmax(1) == b.argmax(1)).sum())
+        total += len(x)
+
+    print(
+        f"parity: max |logit diff| {max_diff:.2e} (atol {args.atol:g}), "
+        f"top-1 agreement {agree}/{total}"
+    )
+    print(
+        f"latency: torch {mean_ms(reference, batches):.1f} ms/batch, "
+        f"onnx {mean_ms(candidate, batches):.1f} ms/batch ({candidate.providers[0]})"
+    )
+
+    ok = max_diff <= args.atol and agree == total
+    print("OK" if ok else "FAIL")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
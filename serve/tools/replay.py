@@ -0,0 +1,300 @@
+"""
+Replay a recorded JSONL request trace against a running server.
+
+One request per line:
+    {"ts": 1718000000.25, "endpoint": "/chat", "body": {...}}
+    {"timestamp": "2024-06-10T06:13:20.5Z", "path": "/api/v1/inference/food-image", "body": {...}}
+
+- ts / timestamp: epoch seconds or ISO 8601; only the gaps between lines
+  matter
+- endpoint / path: /chat, /chat:stream, /food-image (the /api/v1/inference
+  prefix is optional)
+- body: the JSON request body
+
+Arrival is open-loop: each request is sent at its (scaled) offset whether
+or not earlier ones have finished, so a slow server builds a queue the way
+it would in production. --mode max ignores timestamps and keeps
+--max-in-flight requests outstanding instead.
+
+Reports latency percentiles and error rates per endpoint and per
+endpoint + routing hint (taken from the response).
+
+Run from serve/:
+    python -m tools.replay trace.jsonl --base-url http://localhost:8000 --mode scaled --speed 4
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+API_PREFIX = "/api/v1/inference"
+
+
+@dataclass
+class TraceRequest:
+    offset_s: float
+    path: str
+    body: Dict[str, Any]
+
+
+@dataclass
+class Result:
+    endpoint: str
+    routing_hint: str
+    status: Optional[int]
+    latency_s: float
+    lag_s: float  # how late it was sent vs. its scheduled time
+    error: Optional[str] = None
+
+
+@dataclass
+class Report:
+    results: List[Result] = field(default_factory=list)
+    wall_s: float = 0.0
+
+
+def _parse_ts(value: Any) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    s = str(value).strip()
+    if s.endswith("Z"):
+        s = s[:-1] + "+00:00"
+    return datetime.fromisoformat(s).timestamp()
+
+
+def _normalize_path(path: str) -> str:
+    path = "/" + path.lstrip("/")
+    return path if path.startswith(API_PREFIX) else API_PREFIX + path
+
+
+def load_trace(path: Path, limit: Optional[int] = None) -> List[TraceRequest]:
+    rows: List[Tuple[float, str, Dict[str, Any]]] = []
+    with open(path) as f:
+        for lineno, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            obj = json.loads(line)
+            ts = obj.get("ts", obj.get("timestamp"))
+            endpoint = obj.get("endpoint") or obj.get("path")
+            if ts is None or not endpoint or "body" not in obj:
+                raise ValueError(
+                    f"{path}:{lineno}: need ts/timestamp, endpoint/path and body"
+                )
+            rows.append((_parse_ts(ts), _normalize_path(endpoint), obj["body"]))
+            if limit is not None and len(rows) >= limit:
+                break
+
+    rows.sort(key=lambda r: r[0])
+    t0 = rows[0][0] if rows else 0.0
+    return [TraceRequest(ts - t0, p, body) for ts, p, body in rows]
+
+
+def _routing_hint(path: str, payload: Any) -> str:
+    if not isinstance(payload, dict):
+        return "unknown"
+    if path.endswith("/food-image"):
+        if "is_food" not in payload:
+            return "unknown"
+        return "food" if payload["is_food"] else "non_food"
+    details = ((payload.get("data") or {}).get("analyzed_image") or {}).get(
+        "details"
+    ) or {}
+    return details.get("routing_hint", "unknown")
+
+
+async def _send(client: httpx.AsyncClient, req: TraceRequest) -> Tuple[int, str]:
+    """
+    Returns (status, routing hint). Streams are read to the end; the hint
+    comes from their "vision" event.
+    """
+    if not req.path.endswith(":stream"):
+        r = await client.post(req.path, json=req.body)
+        try:
+            payload = r.json()
+        except ValueError:
+            payload = None
+        return r.status_code, _routing_hint(req.path, payload)
+
+    hint = "unknown"
+    async with client.stream("POST", req.path, json=req.body) as r:
+        async for line in r.aiter_lines():
+            if not line.strip() or r.status_code != 200:
+                continue
+            event = json.loads(line)
+            if event.get("event") == "vision":
+                details = (event.get("data") or {}).get("details") or {}
+                hint = details.get("routing_hint", hint)
+            elif event.get("event") == "error":
+                return 599, hint  # failed after headers were sent
+    return r.status_code, hint
+
+
+async def replay(
+    trace: List[TraceRequest],
+    client: httpx.AsyncClient,
+    mode: str,
+    speed: float,
+    max_in_flight: int,
+) -> Report:
+    report = Report()
+    endpoint_of = {p: p[len(API_PREFIX) :] for p in {r.path for r in trace}}
+    start = time.perf_counter()
+
+    async def one(req: TraceRequest, scheduled: float) -> None:
+        sent = time.perf_counter()
+        try:
+            status, hint = await _send(client, req)
+            error = None if status < 400 else f"HTTP {status}"
+        except Exception as e:
+            status, hint, error = None, "unknown", type(e).__name__
+        report.results.append(
+            Result(
+                endpoint=endpoint_of[req.path],
+                routing_hint=hint,
+                status=status,
+                latency_s=time.perf_counter() - sent,
+                lag_s=max(0.0, sent - scheduled),
+                error=error,
+            )
+        )
+
+    if mode == "max":
+        queue: asyncio.Queue = asyncio.Queue()
+        for req in trace:
+            queue.put_nowait(req)
+
+        async def worker() -> None:
+            while not queue.empty():
+                req = queue.get_nowait()
+                await one(req, time.perf_counter())
+
+        await asyncio.gather(*(worker() for _ in range(max_in_flight)))
+    else:
+        factor = 1.0 if mode == "original" else 1.0 / speed
+        tasks = []
+        for req in trace:
+            scheduled = start + req.offset_s * factor
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(req, scheduled)))
+        await asyncio.gather(*tasks)
+
+    report.wall_s = time.perf_counter() - start
+    return report
+
+
+def _summary(results: List[Result]) -> Dict[str, Any]:
+    ok = [r.latency_s * 1000 for r in results if r.error is None]
+    errors: Dict[str, int] = {}
+    for r in results:
+        if r.error is not None:
+            errors[r.error] = errors.get(r.error, 0) + 1
+    summary: Dict[str, Any] = {
+        "requests": len(results),
+        "errors": errors,
+        "error_rate": round(sum(errors.values()) / len(results), 4),
+    }
+    # latency of successful requests only (None if there were none)
+    ms = np.array(ok)
+    for name, q in (("p50_ms", 50), ("p95_ms", 95), ("p99_ms", 99), ("max_ms", 100)):
+        summary[name] = round(float(np.percentile(ms, q)), 1) if ok else None
+    return summary
+
+
+def summarize(report: Report) -> Dict[str, Any]:
+    by_endpoint: Dict[str, List[Result]] = {}
+    by_hint: Dict[str, List[Result]] = {}
+    for r in report.results:
+        by_endpoint.setdefault(r.endpoint, []).append(r)
+        by_hint.setdefault(f"{r.endpoint} [{r.routing_hint}]", []).append(r)
+
+    lags = np.array([r.lag_s * 1000 for r in report.results] or [0.0])
+    n = len(report.results)
+    return {
+        "requests": n,
+        "wall_s": round(report.wall_s, 2),
+        "achieved_rps": round(n / report.wall_s, 2) if report.wall_s else 0.0,
+        "send_lag_p99_ms": round(float(np.percentile(lags, 99)), 1),
+        "overall": _summary(report.results) if n else {},
+        "by_endpoint": {k: _summary(v) for k, v in sorted(by_endpoint.items())},
+        "by_routing_hint": {k: _summary(v) for k, v in sorted(by_hint.items())},
+    }
+
+
+def _print_table(title: str, rows: Dict[str, Dict[str, Any]]) -> None:
+    def fmt(v: Optional[float]) -> str:
+        return f"{v:>8.1f}" if v is not None else f"{'-':>8}"
+
+    print(f"\n{title}")
+    for name, s in rows.items():
+        print(
+            f"  {name:<36} n={s['requests']:<6} err {s['error_rate'] * 100:5.1f}%  "
+            f"p50 {fmt(s['p50_ms'])}  p95 {fmt(s['p95_ms'])}  "
+            f"p99 {fmt(s['p99_ms'])} ms"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("trace", type=Path)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", help="X-Internal-Token (ENV=prod servers)")
+    parser.add_argument(
+        "--mode", choices=["original", "scaled", "max"], default="original"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="--mode scaled: 2 = twice as fast"
+    )
+    parser.add_argument("--max-in-flight", type=int, default=16, help="--mode max")
+    parser.add_argument("--limit", type=int, help="replay only the first N requests")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", help="write the summary to this file")
+    args = parser.parse_args()
+    if args.mode == "scaled" and args.speed <= 0:
+        parser.error("--speed must be > 0")
+
+    trace = load_trace(args.trace, limit=args.limit)
+    if not trace:
+        parser.error(f"{args.trace} has no requests")
+
+    headers = {"X-Internal-Token": args.token} if args.token else {}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=64)
+
+    async def _run() -> Report:
+        async with httpx.AsyncClient(
+            base_url=args.base_url,
+            headers=headers,
+            timeout=args.timeout,
+            limits=limits,
+        ) as client:
+            return await replay(
+                trace, client, args.mode, args.speed, args.max_in_flight
+            )
+
+    summary = summarize(asyncio.run(_run()))
+    print(
+        f"{summary['requests']} requests in {summary['wall_s']} s "
+        f"({summary['achieved_rps']} req/s), send lag p99 "
+        f"{summary['send_lag_p99_ms']} ms"
+    )
+    _print_table("per endpoint", summary["by_endpoint"])
+    _print_table("per endpoint + routing hint", summary["by_routing_hint"])
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2))
+        print(f"\nwrote {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())